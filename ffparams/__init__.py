@@ -0,0 +1,3 @@
+# Keep this module free of imports: every worker process we spawn imports the
+# package, and heavy libraries (pandas, cv2, numpy) are only loaded inside the
+# code paths that use them.
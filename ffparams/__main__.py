@@ -0,0 +1,3 @@
+from ffparams.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,605 @@
+import argparse
+import os
+
+from ffparams.presets import encoding_commands
+
+# Only the standard library and the preset builders are imported here. Each
+# subcommand imports its own modules, so a per-file worker invocation does not
+# pay for pandas or cv2.
+
+PRESETS = list(encoding_commands)
+
+
+def load_reuse(args):
+    if not args.reuse_analysis:
+        return None
+    from ffparams.reuse import load_decisions
+
+    decisions = load_decisions(args.csv_dir)
+    if not any(decisions.values()):
+        print("no preset is enabled for analysis reuse - run 'calibrate-reuse' first")
+    return decisions
+
+
+def cmd_encode(args):
+    from ffparams.encode import encode_all
+
+    encode_all(
+        args.videos,
+        args.compressed,
+        args.presets,
+        args.files,
+        load_reuse(args),
+        args.frame_stats,
+    )
+
+
+def cmd_measure(args):
+    from ffparams.cube import CUBE_FILE, SummaryCube, original_size
+    from ffparams.measure import measure_video_quality
+    from ffparams.metrics import available_metrics, metric_columns
+    from ffparams.results import measure_columns, write_rows
+
+    metrics = available_metrics(args.metrics)
+    columns = measure_columns(metric_columns(metrics))
+    cube_path = os.path.join(args.csv_dir, CUBE_FILE)
+    cube = SummaryCube.load(cube_path)
+    if args.one_pass:
+        return measure_one_pass(args, metrics, columns, cube, cube_path)
+
+    for preset in args.presets:
+        print("processing", preset)
+        rows = measure_video_quality(
+            os.path.join(args.compressed, preset), args.videos, args.files, metrics
+        )
+        write_rows(os.path.join(args.csv_dir, f"{preset}.csv"), rows, columns)
+        cube.reset(preset)
+        for row in rows:
+            cube.add(preset, row, original_size(args.videos, row["file_name"]))
+    cube.save(cube_path)
+
+
+def measure_one_pass(args, metrics, columns, cube, cube_path):
+    from ffparams.cube import original_size
+    from ffparams.measure import measure_sources
+    from ffparams.results import ResultWriter
+
+    writer = ResultWriter(args.csv_dir, columns, cube, cube_path)
+    for preset in args.presets:
+        writer.start(preset)
+    missing = []
+    try:
+        for video, rows in measure_sources(
+            args.compressed,
+            args.videos,
+            args.presets,
+            args.files,
+            metrics,
+            args.retime,
+        ):
+            for preset, row in rows.items():
+                if row["encoding_time"] is None:
+                    missing.append(f"{preset}/{video}")
+                writer.write(preset, row, original_size(args.videos, video))
+            print("processed", video, "against", len(rows), "presets")
+    finally:
+        writer.close()
+    if missing:
+        print(
+            len(missing),
+            "files have no encoding time recorded by 'encode' or 'pipeline'",
+            "(use --retime to measure it):",
+            ", ".join(missing),
+        )
+
+
+def cmd_report(args):
+    if args.summary:
+        return print_summary(args)
+
+    from ffparams.report import combine
+
+    data = combine(args.csv_dir, args.videos, args.presets)
+    if data is None:
+        print("no results found in", args.csv_dir)
+        return 1
+    data.to_csv(args.output, index=False)
+    print("wrote", args.output)
+
+
+def print_summary(args):
+    from ffparams.cube import CUBE_FILE, SummaryCube
+
+    cube_path = os.path.join(args.csv_dir, CUBE_FILE)
+    if os.path.exists(cube_path):
+        cube = SummaryCube.load(cube_path)
+    else:
+        cube = SummaryCube.from_csv_dir(args.csv_dir, args.videos, args.presets)
+        cube.save(cube_path)
+
+    table = cube.table(args.metric, args.stat)
+    print(f"{args.stat} {args.metric}")
+    print(f"{'preset':<12} {'264':>14} {'265':>14}")
+    for preset, values in table.items():
+        cols = [values.get(codec) for codec in ("264", "265")]
+        print(
+            f"{preset:<12} "
+            + " ".join("{:>14}".format("" if v is None else f"{v:.4f}") for v in cols)
+        )
+
+
+def cmd_analyze(args):
+    from ffparams.complexity import analyze_all
+
+    rows = analyze_all(
+        args.videos, args.csv_dir, args.clusters, args.per_cluster, args.files
+    )
+    for row in rows:
+        if row.get("representative"):
+            print("cluster", row["cluster"], "representative", row["file_name"])
+
+
+def cmd_calibrate_reuse(args):
+    from ffparams.metrics import available_metrics
+    from ffparams.reuse import calibrate
+
+    work_dir = args.work_dir or os.path.join(args.compressed, "reuse_calibration")
+    decisions = calibrate(
+        args.videos,
+        work_dir,
+        args.csv_dir,
+        args.files,
+        available_metrics(args.metrics),
+    )
+    for preset, enabled in decisions.items():
+        print(preset, "reuse" if enabled else "independent")
+
+
+def cmd_preview(args):
+    from ffparams.metrics import available_metrics
+    from ffparams.preview import preview_all, preview_error, rank
+
+    work_dir = args.work_dir or os.path.join(args.compressed, "preview")
+    rows = preview_all(
+        args.videos,
+        work_dir,
+        args.csv_dir,
+        args.presets,
+        args.files,
+        args.excerpt_seconds,
+        args.excerpts,
+        available_metrics(args.metrics),
+    )
+
+    print(f"{'preset':<22} {'size KiB':>10} {'encode s':>10} {'psnr':>8} {'ssim':>8}")
+    for entry in rank(rows):
+        print(
+            f"{entry['preset']:<22} {entry['file_size'] / 1024:>10.0f} "
+            f"{entry['encoding_time']:>10.1f} "
+            + " ".join(
+                "{:>8}".format("" if entry[c] is None else f"{entry[c]:.3f}")
+                for c in ("psnr", "ssim")
+            )
+        )
+
+    # Calibration: compare against full runs already in the CSV directory
+    errors = preview_error(rows, args.csv_dir)
+    if errors:
+        print("mean absolute error against full runs")
+        for error in errors:
+            print(
+                f"{error['preset']:<22} "
+                + " ".join(
+                    f"{col}={error[f'{col}_error']:.1%}"
+                    for col in ("file_size", "encoding_time", "psnr", "ssim")
+                    if error[f"{col}_error"] is not None
+                )
+            )
+
+
+def cmd_ladder(args):
+    from ffparams.ladder import LADDER_COLUMNS, measure_ladder, write_ladder
+    from ffparams.metrics import available_metrics, metric_columns
+
+    metrics = available_metrics(args.metrics)
+    rows, times = measure_ladder(
+        args.videos,
+        args.compressed,
+        args.presets,
+        args.renditions,
+        args.files,
+        metrics,
+        args.compare_at,
+    )
+    write_ladder(rows, times, args.csv_dir, LADDER_COLUMNS + metric_columns(metrics))
+
+
+def cmd_record(args):
+    from ffparams.runs import record
+
+    print("recorded run", record(args.csv_dir, args.runs_dir, args.label))
+
+
+def run_dir(runs_dir, run):
+    return run if os.path.isdir(run) else os.path.join(runs_dir, run)
+
+
+def cmd_compare(args):
+    from ffparams.runs import compare, load_env
+
+    base_dir = run_dir(args.runs_dir, args.base)
+    new_dir = run_dir(args.runs_dir, args.new)
+    base_env, new_env = load_env(base_dir), load_env(new_dir)
+    for key in sorted(set(base_env) | set(new_env)):
+        if key != "recorded" and base_env.get(key) != new_env.get(key):
+            print(f"{key}: {base_env.get(key)} -> {new_env.get(key)}")
+
+    rows = compare(
+        base_dir, new_dir, args.threshold, args.quality_threshold, args.alpha
+    )
+    regressions = [row for row in rows if row["regression"]]
+    for row in regressions:
+        p = "" if row["p_value"] is None else f" p={row['p_value']:.3f}"
+        if row["column"] in ("psnr", "ssim"):
+            change = f"{row['change']:+.3f}"
+        else:
+            change = f"{row['change']:+.1%}"
+        print(
+            f"REGRESSION {row['preset']} {row['file_name']} {row['column']}: "
+            f"{row['base']:.4g} -> {row['new']:.4g} ({change}){p}"
+        )
+    print(len(rows), "comparisons,", len(regressions), "regressions")
+    if regressions:
+        return 1
+
+
+def cmd_frame_stats(args):
+    from ffparams.encode import list_videos
+    from ffparams.framestats import add_frame_quality, stats_path, summarize
+
+    import numpy as np
+
+    for preset in args.presets:
+        for video in list_videos(args.videos, args.files):
+            path = stats_path(args.compressed, preset, video)
+            if not os.path.exists(path):
+                continue
+            if args.quality:
+                columns = add_frame_quality(
+                    path,
+                    os.path.join(args.compressed, preset, video),
+                    os.path.join(args.videos, video),
+                )
+            else:
+                with np.load(path) as data:
+                    columns = dict(data)
+            print(preset, video)
+            for entry in summarize(columns):
+                print(
+                    "  "
+                    + " ".join(
+                        f"{key}={value:.4g}"
+                        if isinstance(value, float)
+                        else f"{key}={value}"
+                        for key, value in entry.items()
+                    )
+                )
+
+
+def cmd_bench(args):
+    from ffparams.measure import bench_files
+    from ffparams.results import BENCH_COLUMNS, write_rows
+
+    rows = []
+    for preset in args.presets:
+        print("benchmarking", preset)
+        rows.extend(
+            bench_files(
+                os.path.join(args.compressed, preset),
+                args.videos,
+                args.files,
+                args.repeat,
+            )
+        )
+    write_rows(os.path.join(args.csv_dir, "bench.csv"), rows, BENCH_COLUMNS)
+
+
+def cmd_pipeline(args):
+    from ffparams.cube import CUBE_FILE, SummaryCube
+    from ffparams.metrics import available_metrics, metric_columns
+    from ffparams.pipeline import DagExecutor, build_pipeline
+    from ffparams.results import ResultWriter, pipeline_columns
+
+    metrics = available_metrics(args.metrics)
+    cube_path = os.path.join(args.csv_dir, CUBE_FILE)
+    executor = DagExecutor(args.workers)
+    writer = ResultWriter(
+        args.csv_dir,
+        pipeline_columns(metric_columns(metrics)),
+        SummaryCube.load(cube_path),
+        cube_path,
+    )
+    build_pipeline(
+        executor,
+        writer,
+        args.videos,
+        args.compressed,
+        args.presets,
+        args.files,
+        metrics,
+        load_reuse(args),
+        args.frame_stats,
+    )
+    try:
+        failed = executor.run()
+    finally:
+        writer.close()
+    if failed:
+        print(len(failed), "tasks failed or were skipped")
+        return 1
+
+
+def add_metrics_argument(parser):
+    # Kept in sync with ffparams.metrics.METRICS without importing it here
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        default=["psnr", "ssim"],
+        choices=["psnr", "ssim", "ms_ssim", "vmaf"],
+        help="quality metrics to compute; vmaf and ms_ssim need libvmaf",
+    )
+
+
+def add_frame_stats_argument(parser):
+    parser.add_argument(
+        "--frame-stats",
+        action="store_true",
+        help="store per-frame type, QP, bits and encode time for each encode",
+    )
+
+
+def add_reuse_argument(parser):
+    parser.add_argument(
+        "--reuse-analysis",
+        action="store_true",
+        help="load x265 analysis saved by the first libx265 encode of each "
+        "source into the presets enabled by 'calibrate-reuse'",
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="ffparams", description="ffmpeg encoder preset research tools"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--videos",
+        default=os.environ.get("FFPARAMS_VIDEOS", "videos"),
+        help="directory with the original videos",
+    )
+    common.add_argument(
+        "--compressed",
+        default=os.environ.get("FFPARAMS_COMPRESSED", "compressed"),
+        help="root directory with one subdirectory per preset",
+    )
+    common.add_argument(
+        "--csv-dir",
+        default=os.environ.get("FFPARAMS_CSV_DIR", "csvfiles"),
+        help="directory for per-preset result CSVs",
+    )
+    common.add_argument(
+        "--presets",
+        nargs="+",
+        default=PRESETS,
+        choices=PRESETS,
+        metavar="PRESET",
+        help="presets to run (default: all)",
+    )
+    common.add_argument(
+        "--files",
+        nargs="+",
+        metavar="FILE",
+        help="only process these file names instead of the whole directory",
+    )
+    common.add_argument(
+        "--runs-dir",
+        default=os.environ.get("FFPARAMS_RUNS_DIR", "runs"),
+        help="directory with recorded runs",
+    )
+    common.add_argument(
+        "--record",
+        action="store_true",
+        help="record the CSVs as a new run after the command succeeds",
+    )
+    common.add_argument(
+        "--representatives",
+        action="store_true",
+        help="only process the representative sources chosen by 'analyze'",
+    )
+
+    p = subparsers.add_parser(
+        "encode", parents=[common], help="encode videos with each preset"
+    )
+    add_reuse_argument(p)
+    add_frame_stats_argument(p)
+    p.set_defaults(func=cmd_encode)
+
+    p = subparsers.add_parser(
+        "measure", parents=[common], help="measure compressed videos into CSVs"
+    )
+    add_metrics_argument(p)
+    p.add_argument(
+        "--one-pass",
+        action="store_true",
+        help="score all presets of a source in one ffmpeg graph, decoding the "
+        "original once; encoding_time is taken from the encode step",
+    )
+    p.add_argument(
+        "--retime",
+        action="store_true",
+        help="with --one-pass, re-encode independently encoded files to measure "
+        "encoding_time",
+    )
+    p.set_defaults(func=cmd_measure)
+
+    p = subparsers.add_parser(
+        "report", parents=[common], help="combine per-preset CSVs into one table"
+    )
+    p.add_argument("--output", default="combined_data.csv")
+    p.add_argument(
+        "--summary",
+        action="store_true",
+        help="print per-preset statistics from the summary cube instead",
+    )
+    p.add_argument("--metric", default="psnr", help="metric for --summary")
+    p.add_argument(
+        "--stat", default="mean", help="mean, count, min, max or pNN for --summary"
+    )
+    p.set_defaults(func=cmd_report)
+
+    p = subparsers.add_parser(
+        "analyze",
+        parents=[common],
+        help="measure source complexity (SI/TI) and pick representatives",
+    )
+    p.add_argument("--clusters", type=int, default=4)
+    p.add_argument(
+        "--per-cluster",
+        type=int,
+        default=1,
+        help="representative sources to keep per cluster",
+    )
+    p.set_defaults(func=cmd_analyze)
+
+    p = subparsers.add_parser(
+        "preview",
+        parents=[common],
+        help="predict full-file results from short scene-aware excerpts",
+    )
+    p.add_argument("--excerpt-seconds", type=float, default=2.0)
+    p.add_argument("--excerpts", type=int, default=3, help="excerpts per source")
+    p.add_argument("--work-dir", help="scratch directory for excerpts")
+    add_metrics_argument(p)
+    p.set_defaults(func=cmd_preview)
+
+    p = subparsers.add_parser(
+        "ladder",
+        parents=[common],
+        help="encode multi-resolution renditions from one decode of each source",
+    )
+    p.add_argument(
+        "--renditions",
+        nargs="+",
+        type=int,
+        default=[1080, 720, 480, 360],
+        metavar="HEIGHT",
+    )
+    p.add_argument(
+        "--compare-at",
+        choices=["rendition", "source"],
+        default="rendition",
+        help="scale the reference down to each rendition, or the rendition up "
+        "to the source",
+    )
+    add_metrics_argument(p)
+    p.set_defaults(func=cmd_ladder)
+
+    p = subparsers.add_parser(
+        "record",
+        parents=[common],
+        help="store the current CSVs with an environment fingerprint",
+    )
+    p.add_argument("--label", help="suffix for the run id")
+    p.set_defaults(func=cmd_record)
+
+    p = subparsers.add_parser(
+        "compare",
+        parents=[common],
+        help="diff two recorded runs and fail on regressions",
+    )
+    p.add_argument("base", help="run id or directory of the baseline run")
+    p.add_argument("new", help="run id or directory of the run to check")
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="relative change in time, speed or size counted as a regression",
+    )
+    p.add_argument(
+        "--quality-threshold",
+        type=float,
+        default=0.1,
+        help="drop in PSNR (dB) or SSIM (x100) counted as a regression",
+    )
+    p.add_argument(
+        "--alpha",
+        type=float,
+        default=0.05,
+        help="significance level for repeated timings (Mann-Whitney U)",
+    )
+    p.set_defaults(func=cmd_compare)
+
+    p = subparsers.add_parser(
+        "frame-stats",
+        parents=[common],
+        help="summarize per-frame encoder statistics by frame type",
+    )
+    p.add_argument(
+        "--quality",
+        action="store_true",
+        help="first join per-frame PSNR and SSIM into the stored statistics",
+    )
+    p.set_defaults(func=cmd_frame_stats)
+
+    p = subparsers.add_parser(
+        "bench", parents=[common], help="time encoding and decoding per file"
+    )
+    p.add_argument("--repeat", type=int, default=1)
+    p.set_defaults(func=cmd_bench)
+
+    p = subparsers.add_parser(
+        "pipeline",
+        parents=[common],
+        help="encode, measure and benchmark as one overlapping pipeline",
+    )
+    p.add_argument("--workers", type=int, default=max(1, os.cpu_count() // 2))
+    add_metrics_argument(p)
+    add_reuse_argument(p)
+    add_frame_stats_argument(p)
+    p.set_defaults(func=cmd_pipeline)
+
+    p = subparsers.add_parser(
+        "calibrate-reuse",
+        parents=[common],
+        help="compare x265 analysis reuse with independent encodes per preset",
+    )
+    p.add_argument("--work-dir", help="scratch directory for calibration encodes")
+    add_metrics_argument(p)
+    p.set_defaults(func=cmd_calibrate_reuse)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.representatives and args.command != "analyze":
+        from ffparams.complexity import representatives
+
+        args.files = representatives(args.csv_dir)
+        if args.files is None:
+            print(
+                "no representative sources in", args.csv_dir, "- run 'analyze' first"
+            )
+            return 1
+    status = args.func(args)
+    if args.record and not status and args.command not in ("record", "compare"):
+        from ffparams.runs import record
+
+        print("recorded run", record(args.csv_dir, args.runs_dir))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+import os
+import subprocess
+
+from ffparams.encode import list_videos
+from ffparams.results import read_rows, write_rows
+
+# Source complexity features, stored next to the per-preset CSVs
+COMPLEXITY_FILE = "complexity.csv"
+
+COMPLEXITY_COLUMNS = [
+    "file_name",
+    "frames",
+    "si_mean",
+    "si_max",
+    "ti_mean",
+    "ti_max",
+    "scene_cuts",
+    "noise",
+    "cluster",
+    "representative",
+]
+
+# Mean absolute luma difference (0-255) above which a frame starts a new scene
+SCENE_THRESHOLD = 30.0
+
+# Noise is estimated on every Nth frame; it changes slowly within a shot
+NOISE_EVERY = 10
+
+
+def get_dimensions(video_path):
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height",
+            "-of",
+            "csv=p=0",
+            video_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    width, height = result.stdout.strip().split(",")[:2]
+    return int(width), int(height)
+
+
+def sobel_magnitude(frame):
+    gx = (frame[:-2, 2:] + 2 * frame[1:-1, 2:] + frame[2:, 2:]) - (
+        frame[:-2, :-2] + 2 * frame[1:-1, :-2] + frame[2:, :-2]
+    )
+    gy = (frame[2:, :-2] + 2 * frame[2:, 1:-1] + frame[2:, 2:]) - (
+        frame[:-2, :-2] + 2 * frame[:-2, 1:-1] + frame[:-2, 2:]
+    )
+    return (gx * gx + gy * gy) ** 0.5
+
+
+def estimate_noise(frame):
+    # Immerkaer's fast noise variance estimation: a Laplacian-difference
+    # kernel cancels image structure and leaves mostly noise
+    import numpy as np
+
+    residual = (
+        frame[:-2, :-2]
+        - 2 * frame[:-2, 1:-1]
+        + frame[:-2, 2:]
+        - 2 * frame[1:-1, :-2]
+        + 4 * frame[1:-1, 1:-1]
+        - 2 * frame[1:-1, 2:]
+        + frame[2:, :-2]
+        - 2 * frame[2:, 1:-1]
+        + frame[2:, 2:]
+    )
+    return float(np.sqrt(np.pi / 2) * np.abs(residual).mean() / 6)
+
+
+def analyze_source(video_path):
+    # Decodes the source once as 8-bit luma and computes, per frame, spatial
+    # information (SI, ITU-T P.910), temporal information (TI) and the mean
+    # absolute difference used for scene cuts.
+    import numpy as np
+
+    width, height = get_dimensions(video_path)
+    frame_size = width * height
+    process = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-i",
+            video_path,
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "gray",
+            "-",
+        ],
+        stdout=subprocess.PIPE,
+    )
+
+    si, ti, cuts, noise = [], [], [], []
+    prev = None
+    while True:
+        data = process.stdout.read(frame_size)
+        if len(data) < frame_size:
+            break
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width)
+        frame = frame.astype(np.float32)
+
+        si.append(float(sobel_magnitude(frame).std()))
+        if prev is None:
+            ti.append(0.0)
+            cuts.append(False)
+        else:
+            diff = frame - prev
+            ti.append(float(diff.std()))
+            cuts.append(float(np.abs(diff).mean()) > SCENE_THRESHOLD)
+        if len(si) % NOISE_EVERY == 1:
+            noise.append(estimate_noise(frame))
+        prev = frame
+
+    process.stdout.close()
+    process.wait()
+
+    return {
+        "si": np.array(si),
+        "ti": np.array(ti),
+        "cuts": np.array(cuts, dtype=bool),
+        "noise": float(np.median(noise)) if noise else None,
+    }
+
+
+def summarize(file_name, analysis):
+    si, ti = analysis["si"], analysis["ti"]
+    if len(si) == 0:
+        return {"file_name": file_name, "frames": 0}
+    return {
+        "file_name": file_name,
+        "frames": len(si),
+        "si_mean": float(si.mean()),
+        "si_max": float(si.max()),
+        "ti_mean": float(ti[1:].mean()) if len(ti) > 1 else 0.0,
+        "ti_max": float(ti.max()),
+        "scene_cuts": int(analysis["cuts"].sum()),
+        "noise": analysis["noise"],
+    }
+
+
+def kmeans(points, k, iterations=50):
+    # Plain k-means with farthest-point initialisation, so results are
+    # deterministic for a given corpus
+    import numpy as np
+
+    centers = [points[0]]
+    while len(centers) < k:
+        dist = np.min([((points - c) ** 2).sum(axis=1) for c in centers], axis=0)
+        centers.append(points[int(dist.argmax())])
+    centers = np.array(centers)
+
+    for _ in range(iterations):
+        labels = ((points[:, None, :] - centers[None]) ** 2).sum(axis=2).argmin(1)
+        new_centers = centers.copy()
+        for i in range(k):
+            if (labels == i).any():
+                new_centers[i] = points[labels == i].mean(axis=0)
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+    return labels, centers
+
+
+def cluster_sources(rows, k, per_cluster=1):
+    # Clusters sources on standardized (SI, TI, noise) and marks the
+    # per_cluster sources closest to each cluster centre as representatives
+    import numpy as np
+
+    all_rows = rows
+    rows = [row for row in rows if row.get("frames")]
+    if not rows:
+        return all_rows
+    features = ["si_mean", "ti_mean", "noise"]
+    points = np.array([[float(row[f] or 0) for f in features] for row in rows])
+    std = points.std(axis=0)
+    points = (points - points.mean(axis=0)) / np.where(std > 0, std, 1)
+
+    k = max(1, min(k, len(rows)))
+    labels, centers = kmeans(points, k)
+    distance = ((points - centers[labels]) ** 2).sum(axis=1)
+
+    for i, row in enumerate(rows):
+        row["cluster"] = int(labels[i])
+        row["representative"] = False
+    for cluster in range(k):
+        members = [i for i in range(len(rows)) if labels[i] == cluster]
+        for i in sorted(members, key=lambda i: distance[i])[:per_cluster]:
+            rows[i]["representative"] = True
+    return all_rows
+
+
+def analyze_all(video_dir, csv_dir, clusters, per_cluster=1, files=None):
+    rows = []
+    for video in list_videos(video_dir, files):
+        print("analyzing", video)
+        analysis = analyze_source(os.path.join(video_dir, video))
+        rows.append(summarize(video, analysis))
+    rows = cluster_sources(rows, clusters, per_cluster)
+    write_rows(os.path.join(csv_dir, COMPLEXITY_FILE), rows, COMPLEXITY_COLUMNS)
+    return rows
+
+
+def representatives(csv_dir):
+    # None when there is no analysis or it picked no source, so callers never
+    # mistake an empty selection for "all files"
+    path = os.path.join(csv_dir, COMPLEXITY_FILE)
+    if not os.path.exists(path):
+        return None
+    files = [
+        row["file_name"]
+        for row in read_rows(path)
+        if row["representative"] == "True"
+    ]
+    return files or None
@@ -0,0 +1,180 @@
+import bisect
+import json
+import os
+
+from ffparams.results import read_rows
+
+# Materialized cube, stored next to the per-preset CSVs
+CUBE_FILE = "summary_cube.json"
+
+# Per-file columns aggregated into the cube. "ratio" is derived from the
+# original file size when it is known.
+CUBE_METRICS = [
+    "file_size",
+    "bit_rate",
+    "psnr",
+    "ssim",
+    "ms_ssim",
+    "vmaf",
+    "encoding_time",
+    "decode_time",
+    "decode_fps",
+    "ratio",
+]
+
+
+def split_preset(preset):
+    # "veryslow_265_cmd" -> ("265", "veryslow")
+    parts = preset.split("_")
+    return parts[1], parts[0]
+
+
+def to_number(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Cell:
+    # Running aggregate of one (codec, preset, metric). Values are kept
+    # sorted so percentiles are a lookup rather than a sort per query.
+    # Building from already sorted values is linear.
+    def __init__(self, values=()):
+        self.values = sorted(values)
+        self.total = sum(self.values)
+
+    def add(self, value):
+        bisect.insort(self.values, value)
+        self.total += value
+
+    def remove(self, value):
+        i = bisect.bisect_left(self.values, value)
+        if i < len(self.values) and self.values[i] == value:
+            del self.values[i]
+            self.total -= value
+
+    def stat(self, name):
+        n = len(self.values)
+        if name == "count":
+            return n
+        if n == 0:
+            return None
+        if name == "mean":
+            return self.total / n
+        if name == "min":
+            return self.values[0]
+        if name == "max":
+            return self.values[-1]
+        if name.startswith("p") and name[1:].isdigit():
+            return percentile(self.values, float(name[1:]))
+        raise ValueError(f"unknown statistic {name!r}")
+
+
+def percentile(sorted_values, q):
+    # Linear interpolation between closest ranks, as numpy.percentile does
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class SummaryCube:
+    # (codec x preset x metric) cells answering any statistic. Rows are keyed
+    # by (preset, file_name) so that re-measuring a file within a run
+    # replaces its old contribution instead of counting it twice.
+    def __init__(self):
+        self.cells = {}
+        self.rows = {}
+
+    def add(self, preset, row, original_size=None):
+        key = (preset, row["file_name"])
+        if key in self.rows:
+            self.discard(preset, row["file_name"])
+
+        values = {}
+        for metric in CUBE_METRICS:
+            value = to_number(row.get(metric))
+            if value is not None:
+                values[metric] = value
+        original_size = to_number(original_size)
+        if original_size and values.get("file_size"):
+            values["ratio"] = original_size / values["file_size"]
+
+        codec, name = split_preset(preset)
+        for metric, value in values.items():
+            cell = self.cells.setdefault((codec, name, metric), Cell())
+            cell.add(value)
+        self.rows[key] = values
+
+    def discard(self, preset, file_name):
+        values = self.rows.pop((preset, file_name), {})
+        codec, name = split_preset(preset)
+        for metric, value in values.items():
+            self.cells[(codec, name, metric)].remove(value)
+
+    def query(self, metric, stat="mean", codec=None, preset=None):
+        # {(codec, preset): value} for every matching cell
+        return {
+            (c, p): cell.stat(stat)
+            for (c, p, m), cell in sorted(self.cells.items())
+            if m == metric
+            and (codec is None or c == codec)
+            and (preset is None or p == preset)
+        }
+
+    def table(self, metric, stat="mean"):
+        # {preset: {codec: value}}, the shape the EDA bar plots use
+        table = {}
+        for (codec, preset), value in self.query(metric, stat).items():
+            table.setdefault(preset, {})[codec] = value
+        return table
+
+    def reset(self, preset):
+        # Drops everything known about a preset, e.g. when its CSV is about
+        # to be rewritten, so the cube keeps matching the CSVs
+        codec, name = split_preset(preset)
+        for key in [k for k in self.cells if k[:2] == (codec, name)]:
+            del self.cells[key]
+        for key in [k for k in self.rows if k[0] == preset]:
+            del self.rows[key]
+
+    def save(self, path):
+        # Only the cells are stored, as their sorted values, so loading needs
+        # no re-sorting. Rows stay in memory for replacing a file measured
+        # twice in one run; across runs reset() clears a re-run preset.
+        state = {"/".join(key): cell.values for key, cell in self.cells.items()}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"cells": state}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        cube = cls()
+        if not os.path.exists(path):
+            return cube
+        with open(path) as f:
+            state = json.load(f)
+        for key, values in state["cells"].items():
+            cube.cells[tuple(key.split("/"))] = Cell(values)
+        return cube
+
+    @classmethod
+    def from_csv_dir(cls, csv_dir, video_dir, presets):
+        cube = cls()
+        for preset in presets:
+            path = os.path.join(csv_dir, f"{preset}.csv")
+            if not os.path.exists(path):
+                continue
+            for row in read_rows(path):
+                cube.add(preset, row, original_size(video_dir, row["file_name"]))
+        return cube
+
+
+def original_size(video_dir, file_name):
+    path = os.path.join(video_dir, file_name)
+    return os.path.getsize(path) if os.path.exists(path) else None
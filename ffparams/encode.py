@@ -0,0 +1,92 @@
+import os
+import subprocess
+import time
+
+from ffparams.presets import encoding_commands
+from ffparams.results import record_encode
+
+
+def list_videos(video_dir, files=None):
+    if files:
+        return list(files)
+    return sorted(v for v in os.listdir(video_dir) if v.endswith(".mp4"))
+
+
+def with_x265_params(command_func, params):
+    # Wraps a preset command builder, adding -x265-params before the output
+    def build(original_path, compressed_path):
+        cmd = command_func(original_path, compressed_path)
+        if "-x265-params" in cmd:
+            i = cmd.index("-x265-params") + 1
+            cmd[i] = cmd[i] + ":" + params
+            return cmd
+        return cmd[:-1] + ["-x265-params", params, cmd[-1]]
+
+    return build
+
+
+def encode(original_path, compressed_path, command_func, timeout=None):
+    cmd = command_func(original_path, compressed_path)
+    start_time = time.time()
+    subprocess.run(cmd, check=True, capture_output=True, timeout=timeout)
+    encoding_time = time.time() - start_time
+    # Rename the temporary file to the final file name
+    os.rename(compressed_path + ".tmp.mp4", compressed_path)
+    return encoding_time
+
+
+def encode_all(
+    video_dir, compressed_dir, presets, files=None, reuse=None, frame_stats=False
+):
+    # reuse: analysis reuse decisions from ffparams.reuse.load_decisions, or
+    # None to encode every preset independently. frame_stats also stores
+    # per-frame encoder statistics (see ffparams.framestats). Each encode's
+    # time and analysis reuse status go to ffparams.results.ENCODES_FILE.
+    from ffparams.reuse import (
+        analysis_path,
+        encode_with_reuse,
+        needs_save_encode,
+        order_presets,
+        reuse_mode,
+        save_analysis,
+    )
+
+    if frame_stats:
+        from ffparams.framestats import encode_with_frame_stats, stats_path
+
+    if reuse is not None:
+        presets = order_presets(presets)
+
+    for video in list_videos(video_dir, files):
+        original_path = os.path.join(video_dir, video)
+        if reuse is not None and needs_save_encode(presets, reuse):
+            save_analysis(original_path, compressed_dir, video)
+
+        for preset in presets:
+            dir_path = os.path.join(compressed_dir, preset)
+            os.makedirs(dir_path, exist_ok=True)
+
+            compressed_path = os.path.join(dir_path, video)
+            mode = None if reuse is None else reuse_mode(preset, reuse)
+            statuses = []
+
+            def encode_fn(o, c, f, mode=mode, video=video, statuses=statuses):
+                path = analysis_path(compressed_dir, video)
+                encoding_time, status = encode_with_reuse(o, c, f, mode, path)
+                statuses.append(status)
+                return encoding_time
+
+            if frame_stats:
+                encoding_time = encode_with_frame_stats(
+                    original_path,
+                    compressed_path,
+                    encoding_commands[preset],
+                    encode_fn,
+                    stats_path(compressed_dir, preset, video),
+                )
+            else:
+                encoding_time = encode_fn(
+                    original_path, compressed_path, encoding_commands[preset]
+                )
+            record_encode(compressed_dir, preset, video, encoding_time, statuses[-1])
+            print(preset, video, f"{encoding_time:.2f}s", statuses[-1])
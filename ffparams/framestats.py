@@ -0,0 +1,240 @@
+import csv
+import os
+import re
+import subprocess
+import tempfile
+
+from ffparams.encode import with_x265_params
+from ffparams.metrics import build_graph
+
+# Per-frame encoder statistics, stored as one compressed .npz of typed
+# columns per encode under <compressed>/framestats/<preset>/<video>.npz.
+#
+# ffmpeg's -vstats_file gives frame type, QP and size for every encoder, in
+# the order packets leave the encoder. ffprobe's packet list (same order)
+# maps each one to its display position, so all columns are stored in
+# display order. libx265 also writes a per-frame CSV with encode times; x264
+# has no per-frame timing, so encode_ms is NaN for libx264 presets.
+FRAME_TYPES = {"I": 1, "P": 2, "B": 3, "b": 4}
+
+# Matches "frame=   12 q= 28.0 f_size=  1234 ... type= P"
+VSTATS_FIELD = re.compile(r"(\w+)=\s*(\S+)")
+
+
+def stats_path(compressed_dir, preset, video):
+    return os.path.join(compressed_dir, "framestats", preset, video + ".npz")
+
+
+def with_frame_stats(command_func, vstats_path, x265_csv_path):
+    # Wraps a preset command builder so the encode also logs per-frame stats
+    x265_func = with_x265_params(
+        command_func, f"csv={x265_csv_path}:csv-log-level=2"
+    )
+
+    def build(original_path, compressed_path):
+        cmd = command_func(original_path, compressed_path)
+        if "libx265" in cmd:
+            cmd = x265_func(original_path, compressed_path)
+        return cmd[:1] + ["-vstats_file", vstats_path] + cmd[1:]
+
+    return build
+
+
+def parse_vstats(vstats_path):
+    rows = []
+    with open(vstats_path) as f:
+        for line in f:
+            fields = dict(VSTATS_FIELD.findall(line))
+            if "frame" in fields:
+                rows.append(fields)
+    return rows
+
+
+def parse_x265_csv(csv_path):
+    # {POC: total frame time in ms} from x265's per-frame log
+    if not os.path.exists(csv_path):
+        return {}
+    times = {}
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f, skipinitialspace=True):
+            row = {key.strip(): value for key, value in row.items() if key}
+            if "POC" in row and "Total frame time (ms)" in row:
+                times[int(row["POC"])] = float(row["Total frame time (ms)"])
+    return times
+
+
+def packet_display_order(video_path):
+    # Display index of each video packet, in the order the packets are stored
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts",
+            "-of",
+            "csv=p=0",
+            video_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    pts = [int(line) for line in result.stdout.split() if line.lstrip("-").isdigit()]
+    ranks = sorted(range(len(pts)), key=lambda i: pts[i])
+    order = [0] * len(pts)
+    for display, i in enumerate(ranks):
+        order[i] = display
+    return order
+
+
+def collect(vstats_path, x265_csv_path, compressed_path, output_path):
+    import numpy as np
+
+    vstats = parse_vstats(vstats_path)
+    order = packet_display_order(compressed_path)
+    encode_ms = parse_x265_csv(x265_csv_path)
+    n = len(vstats)
+    if len(order) != n:
+        # Fall back to encode order if the packet list does not line up
+        order = list(range(n))
+
+    columns = {
+        "frame_type": np.zeros(n, dtype=np.uint8),
+        "qp": np.full(n, np.nan, dtype=np.float32),
+        "bits": np.zeros(n, dtype=np.int64),
+        "encode_ms": np.full(n, np.nan, dtype=np.float32),
+    }
+    for fields, display in zip(vstats, order):
+        columns["frame_type"][display] = FRAME_TYPES.get(fields.get("type"), 0)
+        if "q" in fields:
+            columns["qp"][display] = float(fields["q"])
+        columns["bits"][display] = int(fields.get("f_size", 0)) * 8
+        if display in encode_ms:
+            columns["encode_ms"][display] = encode_ms[display]
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    np.savez_compressed(output_path, **columns)
+
+
+def encode_with_frame_stats(
+    original_path, compressed_path, command_func, encode_fn, output_path
+):
+    # Runs encode_fn(original_path, compressed_path, command_func), e.g.
+    # ffparams.encode.encode, with per-frame logging and stores the columns
+    fd, vstats_path = tempfile.mkstemp(suffix=".vstats")
+    os.close(fd)
+    x265_csv_path = vstats_path + ".x265.csv"
+    try:
+        encoding_time = encode_fn(
+            original_path,
+            compressed_path,
+            with_frame_stats(command_func, vstats_path, x265_csv_path),
+        )
+        collect(vstats_path, x265_csv_path, compressed_path, output_path)
+    finally:
+        for path in (vstats_path, x265_csv_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return encoding_time
+
+
+def frame_quality(compressed_path, original_path):
+    # Per-frame PSNR and SSIM from one decode of both files, in display order
+    import numpy as np
+
+    fd, psnr_log = tempfile.mkstemp(suffix=".psnr")
+    os.close(fd)
+    fd, ssim_log = tempfile.mkstemp(suffix=".ssim")
+    os.close(fd)
+    inputs = ("distorted", "reference")
+    try:
+        graph, _ = build_graph(
+            [
+                [
+                    (f"psnr=stats_file={psnr_log}", ["psnr"], inputs),
+                    (f"ssim=stats_file={ssim_log}", ["ssim"], inputs),
+                ]
+            ]
+        )
+        result = subprocess.run(
+            [
+                "ffmpeg",
+                "-i",
+                compressed_path,
+                "-i",
+                original_path,
+                "-filter_complex",
+                graph,
+                "-f",
+                "null",
+                "-",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            last_line = result.stderr.strip().split("\n")[-1]
+            raise RuntimeError(f"ffmpeg per-frame quality pass failed: {last_line}")
+        psnr = read_frame_log(psnr_log, "psnr_avg")
+        ssim = read_frame_log(ssim_log, "All")
+        if not psnr or not ssim:
+            raise RuntimeError(f"no per-frame quality logged for {compressed_path}")
+    finally:
+        os.remove(psnr_log)
+        os.remove(ssim_log)
+
+    return {
+        "psnr": np.array(psnr, dtype=np.float32),
+        "ssim": np.array(ssim, dtype=np.float32),
+    }
+
+
+def read_frame_log(path, key):
+    # "n:1 mse_avg:1.2 ... psnr_avg:41.2 ..." -> [41.2, ...] ordered by n
+    values = {}
+    with open(path) as f:
+        for line in f:
+            fields = dict(re.findall(r"(\w+):(\S+)", line))
+            if "n" in fields and key in fields:
+                values[int(fields["n"])] = float(fields[key])
+    return [values[n] for n in sorted(values)]
+
+
+def add_frame_quality(npz_path, compressed_path, original_path):
+    # Joins per-frame quality into stored encoder stats by display index
+    import numpy as np
+
+    with np.load(npz_path) as data:
+        columns = dict(data)
+    n = len(columns["bits"])
+    for name, values in frame_quality(compressed_path, original_path).items():
+        column = np.full(n, np.nan, dtype=np.float32)
+        column[: min(n, len(values))] = values[:n]
+        columns[name] = column
+    np.savez_compressed(npz_path, **columns)
+    return columns
+
+
+def summarize(columns):
+    # Share of bits, mean QP and mean quality per frame type
+    import numpy as np
+
+    names = {code: name for name, code in FRAME_TYPES.items()}
+    total_bits = columns["bits"].sum() or 1
+    summary = []
+    for code in np.unique(columns["frame_type"]):
+        mask = columns["frame_type"] == code
+        entry = {
+            "type": names.get(int(code), "?"),
+            "frames": int(mask.sum()),
+            "bit_share": float(columns["bits"][mask].sum() / total_bits),
+            "mean_bits": float(columns["bits"][mask].mean()),
+            "mean_qp": float(np.nanmean(columns["qp"][mask])),
+        }
+        for name in ("encode_ms", "psnr", "ssim"):
+            if name in columns and not np.isnan(columns[name][mask]).all():
+                entry[f"mean_{name}"] = float(np.nanmean(columns[name][mask]))
+        summary.append(entry)
+    return summary
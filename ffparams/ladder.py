@@ -0,0 +1,178 @@
+import os
+import subprocess
+import time
+
+from ffparams.complexity import get_dimensions
+from ffparams.encode import list_videos
+from ffparams.metrics import DEFAULT_METRICS, evaluate_many
+from ffparams.presets import encoding_commands
+from ffparams.probe import get_bit_depth_and_bit_rate, get_video_length
+from ffparams.results import write_rows
+
+# ABR ladder encodes: the source is decoded once, range-converted once, then
+# scaled to every rendition and encoded with every selected preset from a
+# single ffmpeg process. Outputs go to <compressed>/ladder/<preset>/<height>/.
+# Every output also carries the source audio, encoded as the presets do, so
+# file_size is comparable with the sweep CSVs. The one process encodes all
+# presets at once, so its wall time is a per-source cost (LADDER_TIME_FILE),
+# not the encode cost of any one preset.
+DEFAULT_RENDITIONS = [1080, 720, 480, 360]
+LADDER_TIME_FILE = "ladder_time.csv"
+LADDER_TIME_COLUMNS = ["file_name", "presets", "renditions", "ladder_time"]
+
+LADDER_COLUMNS = [
+    "file_name",
+    "rendition",
+    "width",
+    "height",
+    "video_length",
+    "file_size",
+    "bit_rate",
+]
+
+
+def output_options(command_func):
+    # Encoder options of a preset builder without its input, filter and output
+    cmd = command_func("IN", "OUT")
+    options = []
+    skip = 0
+    for arg in cmd[1:-1]:
+        if skip:
+            skip -= 1
+        elif arg in ("-i", "-vf"):
+            skip = 1
+        else:
+            options.append(arg)
+    return options
+
+
+def rendition_size(source_width, source_height, height):
+    # Keep the aspect ratio, with an even width as 4:2:0 requires
+    width = round(source_width * height / source_height / 2) * 2
+    return width, height
+
+
+def ladder_command(original_path, outputs, sizes, presets):
+    # outputs[(preset, height)] is the final path of each encode
+    n, p = len(sizes), len(presets)
+    chains = [
+        "[0:v]scale=in_range=full:out_range=tv,split="
+        + str(n)
+        + "".join(f"[s{i}]" for i in range(n))
+    ]
+    for i, (width, height) in enumerate(sizes):
+        chains.append(
+            f"[s{i}]scale={width}:{height},split={p}"
+            + "".join(f"[v{i}_{j}]" for j in range(p))
+        )
+
+    cmd = ["ffmpeg", "-i", original_path, "-filter_complex", ";".join(chains)]
+    for i, (_, height) in enumerate(sizes):
+        for j, preset in enumerate(presets):
+            cmd += ["-map", f"[v{i}_{j}]", "-map", "0:a?"]
+            cmd += output_options(encoding_commands[preset])
+            cmd.append(outputs[(preset, height)] + ".tmp.mp4")
+    return cmd
+
+
+def encode_ladder(original_path, ladder_dir, presets, renditions):
+    video = os.path.basename(original_path)
+    source_width, source_height = get_dimensions(original_path)
+    # Never upscale: renditions above the source are dropped
+    heights = [h for h in renditions if h <= source_height] or [source_height]
+    sizes = [rendition_size(source_width, source_height, h) for h in heights]
+
+    outputs = {}
+    for preset in presets:
+        for height in heights:
+            dir_path = os.path.join(ladder_dir, preset, str(height))
+            os.makedirs(dir_path, exist_ok=True)
+            outputs[(preset, height)] = os.path.join(dir_path, video)
+
+    start_time = time.time()
+    subprocess.run(
+        ladder_command(original_path, outputs, sizes, presets),
+        check=True,
+        capture_output=True,
+    )
+    ladder_time = time.time() - start_time
+    for path in outputs.values():
+        os.rename(path + ".tmp.mp4", path)
+
+    return outputs, sizes, (source_width, source_height), ladder_time
+
+
+def measure_ladder(
+    video_dir,
+    compressed_dir,
+    presets,
+    renditions=DEFAULT_RENDITIONS,
+    files=None,
+    metrics=DEFAULT_METRICS,
+    compare_at="rendition",
+):
+    # compare_at "rendition" scores each rendition against the source scaled
+    # down to its size; "source" scales the rendition up to the source size
+    # instead, closer to what a viewer sees on a full-size player.
+    #
+    # Returns ({preset: rows}, per-source ladder time rows). Every rendition
+    # needing the same scaling is scored in one graph, decoding the source
+    # once per rendition size (once in all with compare_at "source").
+    ladder_dir = os.path.join(compressed_dir, "ladder")
+    rows = {preset: [] for preset in presets}
+    times = []
+    for video in list_videos(video_dir, files):
+        original_path = os.path.join(video_dir, video)
+        outputs, sizes, source_size, ladder_time = encode_ladder(
+            original_path, ladder_dir, presets, renditions
+        )
+        print("ladder", video, f"{ladder_time:.2f}s")
+        times.append(
+            {
+                "file_name": video,
+                "presets": len(presets),
+                "renditions": len(sizes),
+                "ladder_time": ladder_time,
+            }
+        )
+
+        groups = {}
+        for width, height in sizes:
+            if compare_at == "source":
+                prescale = ("distorted", "scale={}:{}".format(*source_size))
+            else:
+                prescale = ("reference", f"scale={width}:{height}")
+            groups.setdefault(prescale, []).extend(
+                (preset, width, height) for preset in presets
+            )
+
+        for (side, scale), variants in groups.items():
+            paths = [outputs[(preset, height)] for preset, _, height in variants]
+            quality = evaluate_many(paths, original_path, metrics, {side: scale})
+            for (preset, width, height), path, values in zip(variants, paths, quality):
+                _, bit_rate = get_bit_depth_and_bit_rate(path)
+                rows[preset].append(
+                    {
+                        "file_name": video,
+                        "rendition": f"{height}p",
+                        "width": width,
+                        "height": height,
+                        "video_length": get_video_length(path),
+                        "file_size": os.path.getsize(path),
+                        # Video stream bit rate, as in the sweep CSVs
+                        "bit_rate": bit_rate,
+                        **values,
+                    }
+                )
+
+    return rows, times
+
+
+def write_ladder(rows, times, csv_dir, columns):
+    for preset, preset_rows in rows.items():
+        write_rows(
+            os.path.join(csv_dir, "ladder", f"{preset}.csv"), preset_rows, columns
+        )
+    write_rows(
+        os.path.join(csv_dir, "ladder", LADDER_TIME_FILE), times, LADDER_TIME_COLUMNS
+    )
@@ -0,0 +1,158 @@
+import os
+import subprocess
+import time
+
+from ffparams.encode import list_videos
+from ffparams.metrics import DEFAULT_METRICS, evaluate, evaluate_many
+from ffparams.presets import encoding_commands
+from ffparams.probe import (
+    get_bit_depth_and_bit_rate,
+    get_decode_speed,
+    get_frame_rate,
+    get_video_length,
+    get_video_resolution_and_rgb,
+)
+from ffparams.results import load_encodes
+
+
+def measure_file(
+    compressed_path,
+    original_path,
+    command_func,
+    metrics=DEFAULT_METRICS,
+    quality=None,
+    encode_record=None,
+    retime=True,
+):
+    # quality: metric values already computed for this file, if any.
+    # encode_record: this file's entry in ffparams.results.ENCODES_FILE.
+    # With retime, encoding_time comes from a fresh independent encode,
+    # except for files encoded with reused analysis: a plain encode would
+    # time a different encode than the one that produced the file, so they
+    # keep the time the encode itself recorded.
+    record = encode_record or {}
+    analysis_reuse = record.get("analysis_reuse")
+    encoding_time = record.get("encoding_time")
+    if quality is None:
+        quality = evaluate(compressed_path, original_path, metrics)
+    # Measure resolution and average RGB values
+    resolution, avg_rgb = get_video_resolution_and_rgb(compressed_path)
+    # Measure bit depth and bit rate
+    bit_depth, bit_rate = get_bit_depth_and_bit_rate(compressed_path)
+    if retime and analysis_reuse in (None, "independent"):
+        encoding_time = measure_encoding_time(
+            original_path, compressed_path, command_func
+        )
+
+    return {
+        "file_name": os.path.basename(compressed_path),
+        "video_length": get_video_length(compressed_path),
+        "file_size": os.path.getsize(compressed_path),
+        "resolution": resolution,
+        "avg_rgb": avg_rgb,
+        "bit_depth": bit_depth,
+        "bit_rate": bit_rate,
+        "frame_rate": get_frame_rate(compressed_path),
+        **quality,
+        "encoding_time": encoding_time,
+        "analysis_reuse": analysis_reuse,
+    }
+
+
+def measure_video_quality(
+    compressed_dir, original_dir, files=None, metrics=DEFAULT_METRICS
+):
+    # Get encoding command function based on directory
+    preset = os.path.basename(compressed_dir)
+    command_func = encoding_commands[preset]
+    encodes = load_encodes(os.path.dirname(compressed_dir))
+    results = []
+    for compressed_file in list_videos(compressed_dir, files):
+        compressed_path = os.path.join(compressed_dir, compressed_file)
+        original_path = os.path.join(original_dir, compressed_file)
+        results.append(
+            measure_file(
+                compressed_path,
+                original_path,
+                command_func,
+                metrics,
+                encode_record=encodes.get(f"{preset}/{compressed_file}"),
+            )
+        )
+    return results
+
+
+def measure_sources(
+    compressed_dir,
+    original_dir,
+    presets,
+    files=None,
+    metrics=DEFAULT_METRICS,
+    retime=False,
+):
+    # Like measure_video_quality for every preset at once, but source by
+    # source: all compressed versions of a source are scored against it in
+    # one ffmpeg graph, decoding the original once instead of once per preset.
+    # Yields (file name, {preset: row}) as each source completes.
+    #
+    # encoding_time comes from the encode log (ffparams.results.ENCODES_FILE)
+    # rather than re-encoding every file, which would decode the original
+    # once per preset again. retime re-encodes independent files anyway.
+    encodes = load_encodes(compressed_dir)
+    for video in list_videos(original_dir, files):
+        original_path = os.path.join(original_dir, video)
+        variants = [
+            preset
+            for preset in presets
+            if os.path.exists(os.path.join(compressed_dir, preset, video))
+        ]
+        if not variants:
+            continue
+        paths = [os.path.join(compressed_dir, preset, video) for preset in variants]
+        quality = evaluate_many(paths, original_path, metrics)
+        yield video, {
+            preset: measure_file(
+                path,
+                original_path,
+                encoding_commands[preset],
+                metrics,
+                values,
+                encodes.get(f"{preset}/{video}"),
+                retime,
+            )
+            for preset, path, values in zip(variants, paths, quality)
+        }
+
+
+def measure_encoding_time(original_path, compressed_path, command_func):
+    start_time = time.time()
+    command = command_func(original_path, compressed_path)
+    subprocess.run(command, capture_output=True, text=True)
+    end_time = time.time()
+    encoding_time = end_time - start_time
+    os.remove(compressed_path + ".tmp.mp4")
+
+    return encoding_time
+
+
+def bench_files(compressed_dir, original_dir, files=None, repeat=1):
+    preset = os.path.basename(compressed_dir)
+    command_func = encoding_commands[preset]
+    results = []
+    for compressed_file in list_videos(compressed_dir, files):
+        compressed_path = os.path.join(compressed_dir, compressed_file)
+        original_path = os.path.join(original_dir, compressed_file)
+        for _ in range(repeat):
+            decode_time, decode_fps = get_decode_speed(compressed_path)
+            results.append(
+                {
+                    "preset": preset,
+                    "file_name": compressed_file,
+                    "encoding_time": measure_encoding_time(
+                        original_path, compressed_path, command_func
+                    ),
+                    "decode_time": decode_time,
+                    "decode_fps": decode_fps,
+                }
+            )
+    return results
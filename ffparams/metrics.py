@@ -0,0 +1,272 @@
+import functools
+import json
+import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Quality metric backends. Each backend declares the inputs it needs, the
+# ffmpeg filters that must be available, and which pass it runs in. Metrics
+# sharing a pass are evaluated in one ffmpeg graph, so both files are decoded
+# once per pass rather than once per metric; separate passes run in parallel.
+#
+# Results are namespaced by metric: the headline value goes in "<name>" (so
+# "psnr" and "ssim" keep their old meaning) and extra values in
+# "<name>_<field>".
+METRICS = {}
+
+
+def register(name, inputs, filter_name, columns, pass_name="lavfi", needs=()):
+    METRICS[name] = {
+        "name": name,
+        "inputs": inputs,
+        "filter": filter_name,
+        "columns": columns,
+        "pass": pass_name,
+        "needs": set(needs) | {filter_name},
+    }
+
+
+register(
+    "psnr",
+    ("distorted", "reference"),
+    "psnr",
+    ["psnr", "psnr_y", "psnr_u", "psnr_v"],
+)
+register(
+    "ssim",
+    ("distorted", "reference"),
+    "ssim",
+    ["ssim", "ssim_y", "ssim_u", "ssim_v"],
+)
+register(
+    "vmaf",
+    ("distorted", "reference"),
+    "libvmaf",
+    ["vmaf"],
+    pass_name="libvmaf",
+)
+register(
+    "ms_ssim",
+    ("distorted", "reference"),
+    "libvmaf",
+    ["ms_ssim"],
+    pass_name="libvmaf",
+)
+
+DEFAULT_METRICS = ["psnr", "ssim"]
+
+
+@functools.lru_cache(maxsize=None)
+def available_filters():
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-filters"], capture_output=True, text=True
+    )
+    filters = set()
+    for line in result.stdout.split("\n"):
+        parts = line.split()
+        # " T.. psnr  VV->V  Calculate the PSNR ..."
+        if len(parts) >= 3 and "->" in parts[2]:
+            filters.add(parts[1])
+    return filters
+
+
+def available_metrics(names):
+    filters = available_filters()
+    usable = []
+    for name in names:
+        missing = METRICS[name]["needs"] - filters
+        if missing:
+            print("skipping", name, "- ffmpeg lacks", ", ".join(sorted(missing)))
+        else:
+            usable.append(name)
+    return usable
+
+
+def metric_columns(names):
+    return [col for name in names for col in METRICS[name]["columns"]]
+
+
+def parse_fields(line):
+    # "PSNR y:34.5 u:40.1 v:41.2 average:35.7 ..." -> {"y": 34.5, ...}
+    return {
+        key.lower(): float(value)
+        for key, value in re.findall(r"(\w+):(inf|-?[\d.]+)", line)
+    }
+
+
+def parse_psnr(lines):
+    fields = parse_fields(lines[-1])
+    return {
+        "psnr": fields.get("average"),
+        "psnr_y": fields.get("y"),
+        "psnr_u": fields.get("u"),
+        "psnr_v": fields.get("v"),
+    }
+
+
+def parse_ssim(lines):
+    fields = parse_fields(lines[-1])
+    return {
+        "ssim": fields.get("all"),
+        "ssim_y": fields.get("y"),
+        "ssim_u": fields.get("u"),
+        "ssim_v": fields.get("v"),
+    }
+
+
+PARSERS = {"psnr": parse_psnr, "ssim": parse_ssim}
+
+
+def lavfi_filter(names, log_path):
+    # One filter per metric: psnr and ssim each get their own instance
+    return [
+        (METRICS[name]["filter"], [name], METRICS[name]["inputs"]) for name in names
+    ]
+
+
+def libvmaf_filter(names, log_path):
+    # A single libvmaf instance computes the vmaf model and any extra
+    # features, logging everything to one JSON file
+    options = f"log_fmt=json:log_path={log_path}"
+    if "ms_ssim" in names:
+        options += ":feature=name=float_ms_ssim"
+    return [(f"libvmaf={options}", names, ("distorted", "reference"))]
+
+
+PASS_FILTERS = {"lavfi": lavfi_filter, "libvmaf": libvmaf_filter}
+
+
+def split_input(stream, prefix, count, chains, prefilter=None):
+    # Labels for count copies of an input stream, adding a split if needed.
+    # prefilter is a single filter applied once before the split.
+    if prefilter:
+        chains.append(f"[{stream}]{prefilter}[{prefix}p]")
+        stream = f"{prefix}p"
+    if count == 1:
+        return [stream]
+    chains.append(
+        f"[{stream}]split={count}" + "".join(f"[{prefix}{i}]" for i in range(count))
+    )
+    return [f"{prefix}{i}" for i in range(count)]
+
+
+def build_graph(variants, prescale=None):
+    # variants: for each distorted input, a list of (filter, metric names,
+    # inputs). The distorted files are inputs 0..n-1 and the reference is
+    # input n, decoded once and split to every filter that needs it. prescale
+    # optionally maps "distorted" or "reference" to a scale filter, used to
+    # compare inputs of different resolutions.
+    #
+    # Returns the filter_complex string and, per variant, the instance name
+    # ffmpeg logs each filter under. ffmpeg names parsed filters
+    # "Parsed_<filter>_<index>", numbering every filter in the graph in the
+    # order it appears; every chain here holds exactly one filter.
+    prescale = prescale or {}
+    chains = []
+    ref_labels = split_input(
+        f"{len(variants)}:v",
+        "r",
+        sum("reference" in f[2] for filters in variants for f in filters),
+        chains,
+        prescale.get("reference"),
+    )
+
+    variant_instances = []
+    for k, filters in enumerate(variants):
+        dist_labels = split_input(
+            f"{k}:v", f"d{k}_", len(filters), chains, prescale.get("distorted")
+        )
+        instances = []
+        for filter_str, names, inputs in filters:
+            pads = "[" + dist_labels.pop(0) + "]"
+            if "reference" in inputs:
+                pads += "[" + ref_labels.pop(0) + "]"
+            filter_name = filter_str.split("=")[0]
+            instances.append((f"Parsed_{filter_name}_{len(chains)}", names))
+            chains.append(pads + filter_str)
+        variant_instances.append(instances)
+
+    return ";".join(chains), variant_instances
+
+
+def run_pass(pass_name, names, compressed_videos, original_video, prescale=None):
+    # One ffmpeg process scoring every compressed video against the reference
+    log_paths = []
+    for _ in compressed_videos:
+        fd, log_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        log_paths.append(log_path)
+    try:
+        graph, variant_instances = build_graph(
+            [PASS_FILTERS[pass_name](names, log_path) for log_path in log_paths],
+            prescale,
+        )
+        cmd = ["ffmpeg"]
+        for compressed_video in compressed_videos:
+            cmd += ["-i", compressed_video]
+        cmd += ["-i", original_video, "-filter_complex", graph, "-f", "null", "-"]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            last_line = result.stderr.strip().split("\n")[-1]
+            raise RuntimeError(f"ffmpeg {pass_name} pass failed: {last_line}")
+        if pass_name == "libvmaf":
+            return [parse_libvmaf_log(log_path, names) for log_path in log_paths]
+        return [
+            parse_instances(result.stderr, instances)
+            for instances in variant_instances
+        ]
+    finally:
+        for log_path in log_paths:
+            os.remove(log_path)
+
+
+def parse_instances(stderr, instances):
+    # Raises if a filter instance logged nothing, which means the graph did
+    # not run as built or ffmpeg numbered the filters differently
+    row = {}
+    for instance, names in instances:
+        lines = [line for line in stderr.split("\n") if f"[{instance} @" in line]
+        if not lines:
+            raise RuntimeError(f"no summary from {instance} in ffmpeg output")
+        for name in names:
+            row.update(PARSERS[name](lines))
+    return row
+
+
+def parse_libvmaf_log(log_path, names):
+    if os.path.getsize(log_path) == 0:
+        raise RuntimeError(f"libvmaf wrote no log to {log_path}")
+    with open(log_path) as f:
+        pooled = json.load(f).get("pooled_metrics", {})
+    keys = {"vmaf": "vmaf", "ms_ssim": "float_ms_ssim"}
+    return {name: pooled.get(keys[name], {}).get("mean") for name in names}
+
+
+def evaluate_many(
+    compressed_videos, original_video, names=DEFAULT_METRICS, prescale=None
+):
+    # Scores several compressed versions of one source in a single graph per
+    # pass, so the reference is decoded once per pass rather than once per
+    # file and metric. Passes run concurrently. Returns one row per file.
+    passes = {}
+    for name in names:
+        passes.setdefault(METRICS[name]["pass"], []).append(name)
+
+    rows = [{} for _ in compressed_videos]
+    with ThreadPoolExecutor(max_workers=len(passes) or 1) as pool:
+        futures = [
+            pool.submit(
+                run_pass, pass_name, group, compressed_videos, original_video, prescale
+            )
+            for pass_name, group in passes.items()
+        ]
+        for future in futures:
+            for row, values in zip(rows, future.result()):
+                row.update(values)
+    return rows
+
+
+def evaluate(compressed_video, original_video, names=DEFAULT_METRICS, prescale=None):
+    return evaluate_many([compressed_video], original_video, names, prescale)[0]
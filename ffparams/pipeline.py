@@ -0,0 +1,307 @@
+import heapq
+import itertools
+import os
+import threading
+
+from ffparams.encode import list_videos
+from ffparams.metrics import DEFAULT_METRICS, evaluate
+from ffparams.presets import encoding_commands
+from ffparams.probe import (
+    get_bit_depth_and_bit_rate,
+    get_decode_speed,
+    get_frame_rate,
+    get_video_length,
+    get_video_resolution_and_rgb,
+)
+from ffparams.results import record_encode
+from ffparams.reuse import (
+    analysis_path,
+    encode_with_reuse,
+    needs_save_encode,
+    order_presets,
+    reuse_mode,
+    save_analysis,
+)
+
+
+# Lower runs first. Downstream stages outrank encodes so that a finished
+# encode flows straight through to its result row instead of waiting behind
+# the rest of the sweep. Decode benchmarks come last, see EXCLUSIVE_STAGES.
+STAGE_PRIORITY = {
+    "row": 0,
+    "metrics": 1,
+    "probe": 2,
+    "encode": 3,
+    "decode_bench": 4,
+}
+
+# Stages that run alone, so their timings match an isolated run. They only
+# start once nothing else is ready or running, and nothing else starts until
+# they finish. With the lowest priority they form one phase at the end of
+# the sweep instead of draining the pool once per file.
+EXCLUSIVE_STAGES = {"decode_bench"}
+
+
+class Task:
+    def __init__(self, name, stage, fn, deps=()):
+        self.name = name
+        self.stage = stage
+        self.fn = fn
+        self.deps = list(deps)
+        self.dependents = []
+        self.pending = len(self.deps)
+        self.result = None
+        self.error = None
+        # Most tasks running at once, this one included, while it ran
+        self.concurrency = 0
+
+
+class DagExecutor:
+    # Runs tasks on one shared pool of worker threads. A task becomes ready
+    # once all of its dependencies have finished, and ready tasks are picked
+    # by stage priority, then in the order they were added.
+    def __init__(self, workers):
+        self.workers = workers
+        self.tasks = []
+        self.ready = []
+        self.remaining = 0
+        self.running = set()
+        self.exclusive = False
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+
+    def add(self, name, stage, fn, deps=()):
+        task = Task(name, stage, fn, deps)
+        for dep in task.deps:
+            dep.dependents.append(task)
+        self.tasks.append(task)
+        return task
+
+    def push(self, task):
+        heapq.heappush(
+            self.ready, (STAGE_PRIORITY[task.stage], next(self.counter), task)
+        )
+
+    def finish(self, task):
+        # Called with the condition held
+        self.remaining -= 1
+        for dependent in task.dependents:
+            if task.error is not None and dependent.error is None:
+                dependent.error = task.error
+            dependent.pending -= 1
+            if dependent.pending == 0:
+                if dependent.error is None:
+                    self.push(dependent)
+                else:
+                    print("skipping", dependent.name, "after failed dependency")
+                    self.finish(dependent)
+        self.cond.notify_all()
+
+    def worker(self):
+        while True:
+            with self.cond:
+                while not self.can_start() and self.remaining > 0:
+                    self.cond.wait()
+                if self.remaining == 0:
+                    return
+                _, _, task = heapq.heappop(self.ready)
+                if task.stage in EXCLUSIVE_STAGES:
+                    self.exclusive = True
+                self.start(task)
+
+            try:
+                task.result = task.fn(*[dep.result for dep in task.deps])
+            except Exception as e:
+                print("failed", task.name, e)
+                task.error = e
+
+            with self.cond:
+                self.running.discard(task)
+                if task.stage in EXCLUSIVE_STAGES:
+                    self.exclusive = False
+                self.finish(task)
+
+    def can_start(self):
+        # Called with the condition held. The next ready task is exclusive
+        # only when no other task is ready, given its priority.
+        if not self.ready or self.exclusive:
+            return False
+        return self.ready[0][2].stage not in EXCLUSIVE_STAGES or not self.running
+
+    def start(self, task):
+        # Called with the condition held
+        self.running.add(task)
+        for running in self.running:
+            running.concurrency = max(running.concurrency, len(self.running))
+
+    def run(self):
+        self.remaining = len(self.tasks)
+        for task in self.tasks:
+            if task.pending == 0:
+                self.push(task)
+
+        threads = [
+            threading.Thread(target=self.worker, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return [task for task in self.tasks if task.error is not None]
+
+
+def probe(compressed_path):
+    resolution, avg_rgb = get_video_resolution_and_rgb(compressed_path)
+    bit_depth, bit_rate = get_bit_depth_and_bit_rate(compressed_path)
+    return {
+        "video_length": get_video_length(compressed_path),
+        "file_size": os.path.getsize(compressed_path),
+        "resolution": resolution,
+        "avg_rgb": avg_rgb,
+        "bit_depth": bit_depth,
+        "bit_rate": bit_rate,
+        "frame_rate": get_frame_rate(compressed_path),
+    }
+
+
+def build_pipeline(
+    executor,
+    writer,
+    video_dir,
+    compressed_dir,
+    presets,
+    files=None,
+    metrics=DEFAULT_METRICS,
+    reuse=None,
+    frame_stats=False,
+):
+    # writer is a ffparams.results.ResultWriter over pipeline_columns().
+    # With analysis reuse, libx265 encodes that load analysis depend on the
+    # encode of the same source that saves it, which only gets a result row
+    # if SAVE_PRESET was selected. frame_stats also stores per-frame encoder
+    # statistics for every encode.
+    if frame_stats:
+        from ffparams.framestats import encode_with_frame_stats, stats_path
+
+    if reuse is not None:
+        presets = order_presets(presets)
+
+    videos = list_videos(video_dir, files)
+    save_tasks = {}
+    if reuse is not None and needs_save_encode(presets, reuse):
+        # SAVE_PRESET was not selected: save the analysis without a result row
+        for video in videos:
+            original_path = os.path.join(video_dir, video)
+            save_tasks[video] = executor.add(
+                f"save analysis {video}",
+                "encode",
+                lambda o=original_path, v=video: save_analysis(o, compressed_dir, v),
+            )
+
+    for preset in presets:
+        command_func = encoding_commands[preset]
+        dir_path = os.path.join(compressed_dir, preset)
+        os.makedirs(dir_path, exist_ok=True)
+        writer.start(preset)
+
+        for video in videos:
+            original_path = os.path.join(video_dir, video)
+            compressed_path = os.path.join(dir_path, video)
+            name = f"{preset}/{video}"
+
+            mode = None if reuse is None else reuse_mode(preset, reuse)
+            deps = [save_tasks[video]] if mode == "load" else []
+
+            def run_encode(
+                *_,
+                original_path=original_path,
+                compressed_path=compressed_path,
+                command_func=command_func,
+                mode=mode,
+                video=video,
+                preset=preset,
+            ):
+                # Returns (encoding time, analysis reuse status)
+                statuses = []
+
+                def encode_fn(o, c, f):
+                    path = analysis_path(compressed_dir, video)
+                    encoding_time, status = encode_with_reuse(o, c, f, mode, path)
+                    statuses.append(status)
+                    return encoding_time
+
+                if frame_stats:
+                    encoding_time = encode_with_frame_stats(
+                        original_path,
+                        compressed_path,
+                        command_func,
+                        encode_fn,
+                        stats_path(compressed_dir, preset, video),
+                    )
+                else:
+                    encoding_time = encode_fn(
+                        original_path, compressed_path, command_func
+                    )
+                record_encode(
+                    compressed_dir, preset, video, encoding_time, statuses[-1]
+                )
+                return encoding_time, statuses[-1]
+
+            encoded = executor.add(f"encode {name}", "encode", run_encode, deps)
+            if mode == "save":
+                save_tasks[video] = encoded
+
+            probed = executor.add(
+                f"probe {name}",
+                "probe",
+                lambda _, c=compressed_path: probe(c),
+                [encoded],
+            )
+            measured = executor.add(
+                f"metrics {name}",
+                "metrics",
+                lambda _, c=compressed_path, o=original_path: evaluate(c, o, metrics),
+                [encoded],
+            )
+            # The decode benchmark runs alone on the pool (EXCLUSIVE_STAGES),
+            # so decode_time and decode_fps are comparable to isolated runs.
+            # Encodes overlap; encode_concurrency records how many tasks ran
+            # alongside each one so its encoding_time can be judged.
+            benched = executor.add(
+                f"decode_bench {name}",
+                "decode_bench",
+                lambda _, c=compressed_path: get_decode_speed(c),
+                [measured],
+            )
+
+            def row(
+                encoded_result,
+                info,
+                metrics,
+                decode,
+                preset=preset,
+                video=video,
+                original_path=original_path,
+                encoded=encoded,
+            ):
+                writer.write(
+                    preset,
+                    {
+                        "file_name": video,
+                        **info,
+                        **metrics,
+                        "encoding_time": encoded_result[0],
+                        "analysis_reuse": encoded_result[1],
+                        "encode_concurrency": encoded.concurrency,
+                        "decode_time": decode[0],
+                        "decode_fps": decode[1],
+                    },
+                    os.path.getsize(original_path),
+                )
+                print("done", preset, video)
+
+            executor.add(
+                f"row {name}", "row", row, [encoded, probed, measured, benched]
+            )
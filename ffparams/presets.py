@@ -0,0 +1,319 @@
+# Command returners based on presets used
+def base_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def base_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def crf51_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-crf",
+        "51",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def crf51_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-crf",
+        "51",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def fastdecode_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-tune",
+        "fastdecode",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def fastdecode_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-tune",
+        "fastdecode",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def grain_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-tune",
+        "grain",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def grain_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-tune",
+        "grain",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def slow_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-preset",
+        "slow",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def slow_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-preset",
+        "slow",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def veryfast_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-preset",
+        "veryfast",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def veryfast_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-preset",
+        "veryfast",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def veryslow_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-preset",
+        "veryslow",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def veryslow_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-preset",
+        "veryslow",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def zerolatency_265_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx265",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-tune",
+        "zerolatency",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+def zerolatency_264_cmd(original_path, compressed_path):
+    return [
+        "ffmpeg",
+        "-i",
+        original_path,
+        "-c:v",
+        "libx264",
+        "-vf",
+        "scale=in_range=full:out_range=tv",
+        "-color_range",
+        "tv",
+        "-tune",
+        "zerolatency",
+        "-movflags",
+        "+faststart",
+        compressed_path + ".tmp.mp4",
+    ]
+
+
+encoding_commands = {
+    "base_264_cmd": base_264_cmd,
+    "base_265_cmd": base_265_cmd,
+    "crf51_264_cmd": crf51_264_cmd,
+    "crf51_265_cmd": crf51_265_cmd,
+    "fastdecode_264_cmd": fastdecode_264_cmd,
+    "fastdecode_265_cmd": fastdecode_265_cmd,
+    "grain_264_cmd": grain_264_cmd,
+    "grain_265_cmd": grain_265_cmd,
+    "slow_264_cmd": slow_264_cmd,
+    "slow_265_cmd": slow_265_cmd,
+    "veryfast_264_cmd": veryfast_264_cmd,
+    "veryfast_265_cmd": veryfast_265_cmd,
+    "veryslow_264_cmd": veryslow_264_cmd,
+    "veryslow_265_cmd": veryslow_265_cmd,
+    "zerolatency_264_cmd": zerolatency_264_cmd,
+    "zerolatency_265_cmd": zerolatency_265_cmd,
+}
@@ -0,0 +1,272 @@
+import os
+import subprocess
+import time
+
+from ffparams.complexity import analyze_source
+from ffparams.encode import list_videos
+from ffparams.metrics import DEFAULT_METRICS, evaluate
+from ffparams.presets import encoding_commands
+from ffparams.probe import get_video_length
+from ffparams.results import read_rows, write_rows
+
+# Preview sweeps encode a few short excerpts per source instead of the whole
+# file and extrapolate full-file results. Excerpts are placed in whole scenes
+# (or in excerpt-length windows when there are too few scene cuts) and cover
+# the calmest, the busiest and typical parts, each weighted by the share of
+# the source it stands for.
+PREVIEW_FILE = "preview.csv"
+PREVIEW_ERROR_FILE = "preview_error.csv"
+
+PREDICTED = ["file_size", "encoding_time", "psnr", "ssim"]
+
+PREVIEW_COLUMNS = ["preset", "file_name", "excerpts", "excerpt_seconds"] + PREDICTED
+
+ERROR_COLUMNS = ["preset", "files"] + [f"{col}_error" for col in PREDICTED]
+
+
+def scenes(cuts):
+    # (start, end) frame ranges between scene cuts
+    bounds = [0] + [i for i, cut in enumerate(cuts) if cut and i > 0] + [len(cuts)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def windows(segments, length):
+    # Splits each segment into excerpt-length windows; a short remainder is
+    # merged into the window before it
+    result = []
+    for start, end in segments:
+        bounds = list(range(start, end, length))
+        if len(bounds) > 1 and end - bounds[-1] < length:
+            bounds.pop()
+        result.extend(zip(bounds, bounds[1:] + [end]))
+    return result
+
+
+def choose_excerpts(analysis, fps, excerpt_seconds, count):
+    # Returns [(start_seconds, weight)] for up to count excerpts, with
+    # weights summing to 1
+    ti = analysis["ti"]
+    total = len(ti)
+    if total == 0:
+        return []
+    length = max(1, min(total, int(excerpt_seconds * fps)))
+
+    segments = scenes(analysis["cuts"])
+    if len(segments) < count:
+        # Too few scene cuts to pick from (often none at all): rank
+        # excerpt-length windows instead, so motion changes within a scene
+        # are still covered
+        segments = windows(segments, length)
+
+    def mean_ti(segment):
+        # TI of a frame is its difference to the previous one, so the first
+        # frame of a segment is left out
+        values = ti[segment[0] + 1 : segment[1]]
+        return float(sum(values) / len(values)) if len(values) else 0.0
+
+    ranked_ti = {segment: mean_ti(segment) for segment in segments}
+    ranked = sorted(segments, key=ranked_ti.get)
+    # Calmest and busiest segment, then evenly spaced ones in between
+    indices = {0, len(ranked) - 1}
+    for i in range(1, count - 1):
+        indices.add(i * (len(ranked) - 1) // (count - 1))
+    picks = [ranked[i] for i in sorted(indices)][:count]
+
+    # Every segment is represented by the pick with the closest mean TI
+    weights = {pick: 0 for pick in picks}
+    for segment in ranked:
+        nearest = min(picks, key=lambda p: abs(ranked_ti[p] - ranked_ti[segment]))
+        weights[nearest] += segment[1] - segment[0]
+
+    excerpts = []
+    for start, end in picks:
+        first = start
+        # Centre the excerpt in segments longer than the excerpt
+        if end - start > length:
+            first += (end - start - length) // 2
+        first = max(0, min(first, total - length))
+        excerpts.append((first / fps, weights[(start, end)] / total))
+    return excerpts
+
+
+def cut_excerpt(original_path, excerpt_path, start, seconds):
+    # Lossless FFV1 copy of the excerpt, so every preset encodes exactly the
+    # same frames and quality is measured against the same reference. Audio
+    # is kept: the presets encode it too, and full-run file sizes include it.
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-ss",
+            f"{start:.3f}",
+            "-t",
+            f"{seconds:.3f}",
+            "-i",
+            original_path,
+            "-c:v",
+            "ffv1",
+            "-c:a",
+            "copy",
+            excerpt_path,
+        ],
+        check=True,
+    )
+
+
+def encode_excerpt(excerpt_path, output_path, command_func):
+    start_time = time.time()
+    subprocess.run(
+        command_func(excerpt_path, output_path), check=True, capture_output=True
+    )
+    encoding_time = time.time() - start_time
+    os.rename(output_path + ".tmp.mp4", output_path)
+    return encoding_time
+
+
+def startup_times(original_path, work_dir, presets, fps):
+    # {preset: seconds} to encode a two-frame excerpt, taken as the fixed
+    # process and encoder startup cost that does not scale with duration
+    video = os.path.basename(original_path)
+    excerpt_path = os.path.join(work_dir, f"{video}.startup.mkv")
+    cut_excerpt(original_path, excerpt_path, 0, 2 / fps)
+    times = {}
+    for preset in presets:
+        output_path = os.path.join(work_dir, f"{preset}_startup_{video}")
+        times[preset] = encode_excerpt(
+            excerpt_path, output_path, encoding_commands[preset]
+        )
+        os.remove(output_path)
+    os.remove(excerpt_path)
+    return times
+
+
+def preview_source(original_path, work_dir, presets, excerpt_seconds, count, metrics):
+    video = os.path.basename(original_path)
+    duration = get_video_length(original_path)
+    analysis = analyze_source(original_path)
+    if not duration or len(analysis["ti"]) == 0:
+        print("cannot preview", video)
+        return []
+    fps = len(analysis["ti"]) / duration
+    excerpts = choose_excerpts(analysis, fps, excerpt_seconds, count)
+    seconds = min(excerpt_seconds, duration)
+
+    paths = []
+    for i, (start, _) in enumerate(excerpts):
+        excerpt_path = os.path.join(work_dir, f"{video}.excerpt{i}.mkv")
+        cut_excerpt(original_path, excerpt_path, start, seconds)
+        paths.append(excerpt_path)
+    startup = startup_times(original_path, work_dir, presets, fps)
+
+    rows = []
+    for preset in presets:
+        # Size and time scale with duration; quality is a weighted mean. The
+        # startup cost is paid once per encode, so it is taken out of each
+        # excerpt's time before scaling and added back once.
+        row = {col: 0.0 for col in PREDICTED}
+        row["encoding_time"] = startup[preset]
+        for excerpt_path, (_, weight) in zip(paths, excerpts):
+            output_path = os.path.join(work_dir, f"{preset}_{video}")
+            encoding_time = encode_excerpt(
+                excerpt_path, output_path, encoding_commands[preset]
+            )
+            size = os.path.getsize(output_path)
+            quality = evaluate(output_path, excerpt_path, metrics)
+            os.remove(output_path)
+
+            scale = weight * duration / seconds
+            row["file_size"] += size * scale
+            row["encoding_time"] += max(0.0, encoding_time - startup[preset]) * scale
+            for col in ("psnr", "ssim"):
+                if row[col] is not None and quality.get(col) is not None:
+                    row[col] += quality[col] * weight
+                else:
+                    row[col] = None
+        row.update(
+            {
+                "preset": preset,
+                "file_name": video,
+                "excerpts": len(excerpts),
+                "excerpt_seconds": seconds,
+            }
+        )
+        rows.append(row)
+        print(preset, video, f"~{row['file_size'] / 1024:.0f} KiB")
+
+    for excerpt_path in paths:
+        os.remove(excerpt_path)
+    return rows
+
+
+def preview_all(
+    video_dir,
+    work_dir,
+    csv_dir,
+    presets,
+    files=None,
+    excerpt_seconds=2.0,
+    count=3,
+    metrics=DEFAULT_METRICS,
+):
+    os.makedirs(work_dir, exist_ok=True)
+    rows = []
+    for video in list_videos(video_dir, files):
+        rows.extend(
+            preview_source(
+                os.path.join(video_dir, video),
+                work_dir,
+                presets,
+                excerpt_seconds,
+                count,
+                metrics,
+            )
+        )
+    write_rows(os.path.join(csv_dir, PREVIEW_FILE), rows, PREVIEW_COLUMNS)
+    return rows
+
+
+def preview_error(rows, csv_dir):
+    # Mean absolute percentage error of the predictions against full runs in
+    # the per-preset CSVs, for every source that has both
+    errors = []
+    for preset in sorted({row["preset"] for row in rows}):
+        path = os.path.join(csv_dir, f"{preset}.csv")
+        if not os.path.exists(path):
+            continue
+        full = {row["file_name"]: row for row in read_rows(path)}
+        diffs = {col: [] for col in PREDICTED}
+        for row in rows:
+            if row["preset"] != preset or row["file_name"] not in full:
+                continue
+            for col in PREDICTED:
+                actual = full[row["file_name"]].get(col)
+                if row[col] is None or not actual or float(actual) == 0:
+                    continue
+                diffs[col].append(abs(row[col] - float(actual)) / float(actual))
+        files = max(len(values) for values in diffs.values())
+        if files == 0:
+            continue
+        error = {"preset": preset, "files": files}
+        for col, values in diffs.items():
+            error[f"{col}_error"] = sum(values) / len(values) if values else None
+        errors.append(error)
+
+    write_rows(os.path.join(csv_dir, PREVIEW_ERROR_FILE), errors, ERROR_COLUMNS)
+    return errors
+
+
+def rank(rows):
+    # Mean prediction per preset, smallest predicted files first
+    by_preset = {}
+    for row in rows:
+        by_preset.setdefault(row["preset"], []).append(row)
+    summary = []
+    for preset, preset_rows in by_preset.items():
+        entry = {"preset": preset}
+        for col in PREDICTED:
+            values = [row[col] for row in preset_rows if row[col] is not None]
+            entry[col] = sum(values) / len(values) if values else None
+        summary.append(entry)
+    return sorted(summary, key=lambda entry: entry["file_size"])
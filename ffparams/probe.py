@@ -0,0 +1,121 @@
+import subprocess
+import time
+
+
+def get_video_length(video_path):
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            video_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        video_length = float(result.stdout.strip())
+    except ValueError:
+        video_length = None
+    return video_length
+
+
+def get_video_resolution_and_rgb(video_path):
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    resolution = (width, height)
+
+    avg_rgb = None
+    if cap.isOpened():
+        ret, frame = cap.read()
+        if ret:
+            avg_rgb = cv2.mean(frame)[:3]
+    cap.release()
+
+    return resolution, avg_rgb
+
+
+def get_bit_depth_and_bit_rate(video_path):
+    result_bit_depth = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=bits_per_raw_sample",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            video_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    bit_depth = (
+        int(result_bit_depth.stdout.strip())
+        if result_bit_depth.stdout.strip().isdigit()
+        else None
+    )
+
+    result_bit_rate = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=bit_rate",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            video_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    bit_rate = (
+        int(result_bit_rate.stdout.strip())
+        if result_bit_rate.stdout.strip().isdigit()
+        else None
+    )
+
+    return bit_depth, bit_rate
+
+
+def get_frame_rate(video_path):
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    frame_rate = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+
+    return frame_rate
+
+
+def get_decode_speed(video_path):
+    start_time = time.time()
+    result = subprocess.run(
+        ["ffmpeg", "-i", video_path, "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    decode_time = time.time() - start_time
+
+    # The last progress line holds the total number of decoded frames
+    frames = None
+    for line in result.stderr.replace("\r", "\n").split("\n"):
+        if line.startswith("frame="):
+            value = line.split("=")[1].split()[0]
+            if value.isdigit():
+                frames = int(value)
+    decode_fps = frames / decode_time if frames and decode_time > 0 else None
+
+    return decode_time, decode_fps
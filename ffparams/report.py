@@ -0,0 +1,62 @@
+import os
+
+from ffparams.complexity import COMPLEXITY_FILE
+from ffparams.encode import list_videos
+
+# Columns that are the same for every preset of a given source video
+STATIC_COLUMNS = ["file_name", "video_length", "resolution", "bit_depth", "frame_rate"]
+VARIABLE_COLUMNS = ["file_size", "avg_rgb", "bit_rate", "psnr", "ssim", "encoding_time"]
+
+
+def prefix_name(preset):
+    return preset[: -len("_cmd")] if preset.endswith("_cmd") else preset
+
+
+def combine(csv_dir, video_dir, presets):
+    # One wide row per source video, with every preset's measurements as
+    # "<preset>_<column>" plus compression ratios against the original.
+    # File sizes are in KiB, as in combined_data.csv.
+    import pandas as pd
+
+    data = None
+    for preset in presets:
+        path = os.path.join(csv_dir, f"{preset}.csv")
+        if not os.path.exists(path):
+            print("missing", path)
+            continue
+        df = pd.read_csv(path)
+        df["file_size"] = df["file_size"] / 1024
+        name = prefix_name(preset)
+        wide = df[["file_name"] + VARIABLE_COLUMNS].rename(
+            columns={col: f"{name}_{col}" for col in VARIABLE_COLUMNS}
+        )
+        if data is None:
+            data = df[STATIC_COLUMNS].merge(wide, on="file_name")
+        else:
+            data = data.merge(wide, on="file_name", how="outer")
+
+    if data is None:
+        return None
+
+    # Get original sizes
+    sizes = {
+        video: os.path.getsize(os.path.join(video_dir, video)) / 1024
+        for video in list_videos(video_dir)
+    }
+    data["original_size"] = data["file_name"].map(sizes)
+
+    # Compression ratio of each preset
+    for preset in presets:
+        name = prefix_name(preset)
+        if f"{name}_file_size" in data:
+            data[f"{name}_ratio"] = data["original_size"] / data[f"{name}_file_size"]
+
+    # Source complexity features from 'ffparams analyze', when available
+    complexity_path = os.path.join(csv_dir, COMPLEXITY_FILE)
+    if os.path.exists(complexity_path):
+        complexity = pd.read_csv(complexity_path)
+        data = data.merge(
+            complexity.drop(columns=["representative"]), on="file_name", how="left"
+        )
+
+    return data
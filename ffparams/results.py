@@ -0,0 +1,119 @@
+import csv
+import json
+import os
+import threading
+import time
+
+PROBE_COLUMNS = [
+    "file_name",
+    "video_length",
+    "file_size",
+    "resolution",
+    "avg_rgb",
+    "bit_depth",
+    "bit_rate",
+    "frame_rate",
+]
+
+
+def measure_columns(metric_columns):
+    return PROBE_COLUMNS + metric_columns + ["encoding_time", "analysis_reuse"]
+
+
+def pipeline_columns(metric_columns):
+    return measure_columns(metric_columns) + [
+        "encode_concurrency",
+        "decode_time",
+        "decode_fps",
+    ]
+
+
+# Log of the encodes under <compressed>, keyed "<preset>/<video>": the
+# encoding_time measured by the encode itself and its analysis_reuse status
+# (see ffparams.reuse.encode_with_reuse). Result rows take both from here.
+ENCODES_FILE = "encodes.json"
+encodes_lock = threading.Lock()
+
+BENCH_COLUMNS = ["preset", "file_name", "encoding_time", "decode_time", "decode_fps"]
+
+
+def write_rows(path, rows, columns):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def load_encodes(compressed_dir):
+    path = os.path.join(compressed_dir, ENCODES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def record_encode(compressed_dir, preset, video, encoding_time, analysis_reuse):
+    path = os.path.join(compressed_dir, ENCODES_FILE)
+    with encodes_lock:
+        encodes = load_encodes(compressed_dir)
+        encodes[f"{preset}/{video}"] = {
+            "encoding_time": encoding_time,
+            "analysis_reuse": analysis_reuse,
+        }
+        os.makedirs(compressed_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(encodes, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class ResultWriter:
+    # Appends rows to one CSV per preset as soon as they are complete. When a
+    # summary cube is given it is updated with every row and saved at most
+    # every save_interval seconds, and on close().
+    def __init__(self, csv_dir, columns, cube=None, cube_path=None, save_interval=60):
+        self.csv_dir = csv_dir
+        self.columns = columns
+        self.cube = cube
+        self.cube_path = cube_path
+        self.save_interval = save_interval
+        self.last_save = time.monotonic()
+        self.unsaved = False
+        self.lock = threading.Lock()
+        os.makedirs(csv_dir, exist_ok=True)
+
+    def start(self, preset):
+        write_rows(os.path.join(self.csv_dir, f"{preset}.csv"), [], self.columns)
+        if self.cube is not None:
+            with self.lock:
+                self.cube.reset(preset)
+
+    def write(self, preset, row, original_size=None):
+        path = os.path.join(self.csv_dir, f"{preset}.csv")
+        with self.lock:
+            with open(path, "a", newline="") as f:
+                csv.DictWriter(
+                    f, fieldnames=self.columns, extrasaction="ignore"
+                ).writerow(row)
+            if self.cube is not None:
+                self.cube.add(preset, row, original_size)
+                self.unsaved = True
+                if time.monotonic() - self.last_save >= self.save_interval:
+                    self.save_cube()
+
+    def save_cube(self):
+        # Called with the lock held
+        self.cube.save(self.cube_path)
+        self.last_save = time.monotonic()
+        self.unsaved = False
+
+    def close(self):
+        with self.lock:
+            if self.cube is not None and self.unsaved:
+                self.save_cube()
@@ -0,0 +1,329 @@
+import json
+import os
+import subprocess
+import time
+
+from ffparams.encode import encode, list_videos, with_x265_params
+from ffparams.metrics import DEFAULT_METRICS, evaluate
+from ffparams.presets import encoding_commands
+from ffparams.results import write_rows
+
+# x265 analysis reuse: the first libx265 encode of a source saves its motion
+# estimation and mode decisions, later libx265 presets of the same source load
+# them instead of searching again. x264 has no equivalent for single-pass CRF
+# encodes (its stats files only drive two-pass rate control), so libx264
+# presets always encode independently.
+SAVE_PRESET = "base_265_cmd"
+ANALYSIS_REUSE_LEVEL = 10
+
+# x265 only reuses analysis safely when these settings match the saving
+# encode; loading into other settings can crash x265 or stall it for hours.
+# Defaults per x265 --preset, overridden by --tune and -x265-params.
+ANALYSIS_SETTINGS = ["bframes", "ref", "ctu", "rc-lookahead"]
+X265_PRESET_SETTINGS = {
+    "ultrafast": {"bframes": 3, "ref": 1, "ctu": 32, "rc-lookahead": 5},
+    "superfast": {"bframes": 3, "ref": 1, "ctu": 32, "rc-lookahead": 10},
+    "veryfast": {"bframes": 4, "ref": 2, "ctu": 64, "rc-lookahead": 15},
+    "faster": {"bframes": 4, "ref": 2, "ctu": 64, "rc-lookahead": 15},
+    "fast": {"bframes": 4, "ref": 3, "ctu": 64, "rc-lookahead": 15},
+    "medium": {"bframes": 4, "ref": 3, "ctu": 64, "rc-lookahead": 20},
+    "slow": {"bframes": 4, "ref": 4, "ctu": 64, "rc-lookahead": 25},
+    "slower": {"bframes": 8, "ref": 5, "ctu": 64, "rc-lookahead": 40},
+    "veryslow": {"bframes": 8, "ref": 5, "ctu": 64, "rc-lookahead": 40},
+    "placebo": {"bframes": 8, "ref": 5, "ctu": 64, "rc-lookahead": 60},
+}
+X265_TUNE_SETTINGS = {"zerolatency": {"bframes": 0, "rc-lookahead": 0}}
+
+# Load encodes and calibration encodes are killed after this many times the
+# source's save encode took (at least MIN_TIMEOUT seconds), or after
+# DEFAULT_TIMEOUT seconds when the save time is unknown, and the preset then
+# encodes without analysis
+TIMEOUT_FACTOR = 3
+MIN_TIMEOUT = 30
+DEFAULT_TIMEOUT = 600
+
+# Per-preset decisions from 'calibrate-reuse', stored next to the CSVs
+REUSE_FILE = "analysis_reuse.json"
+REUSE_CALIBRATION_FILE = "analysis_reuse.csv"
+
+# A preset keeps reuse only if, on average over the calibration set, it saves
+# at least this much encode time without losing more than this much quality
+# or growing the file by more than this much
+MIN_TIME_SAVING = 0.10
+MAX_PSNR_DROP = 0.10
+MAX_SIZE_GROWTH = 0.02
+
+CALIBRATION_COLUMNS = [
+    "preset",
+    "file_name",
+    "independent_time",
+    "reuse_time",
+    "time_saving",
+    "independent_size",
+    "reuse_size",
+    "size_change",
+    "independent_psnr",
+    "reuse_psnr",
+    "psnr_change",
+    "independent_ssim",
+    "reuse_ssim",
+]
+
+
+def is_x265(preset):
+    return "_265_" in preset
+
+
+def analysis_path(compressed_dir, video):
+    return os.path.join(compressed_dir, "analysis", video + ".x265.dat")
+
+
+def analysis_settings(command_func):
+    cmd = command_func("IN", "OUT")
+
+    def option(name, default=None):
+        return cmd[cmd.index(name) + 1] if name in cmd else default
+
+    settings = dict(X265_PRESET_SETTINGS[option("-preset", "medium")])
+    settings.update(X265_TUNE_SETTINGS.get(option("-tune"), {}))
+    for param in option("-x265-params", "").split(":"):
+        key, _, value = param.partition("=")
+        if key in settings:
+            settings[key] = int(value)
+    return settings
+
+
+def can_load(preset):
+    # Whether preset may load analysis saved by SAVE_PRESET
+    return (
+        is_x265(preset)
+        and preset != SAVE_PRESET
+        and analysis_settings(encoding_commands[preset])
+        == analysis_settings(encoding_commands[SAVE_PRESET])
+    )
+
+
+def save_command(command_func, path):
+    return with_x265_params(
+        command_func,
+        f"analysis-save={path}:analysis-save-reuse-level={ANALYSIS_REUSE_LEVEL}",
+    )
+
+
+def load_command(command_func, path):
+    return with_x265_params(
+        command_func,
+        f"analysis-load={path}:analysis-load-reuse-level={ANALYSIS_REUSE_LEVEL}",
+    )
+
+
+def load_decisions(csv_dir):
+    path = os.path.join(csv_dir, REUSE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def reuse_mode(preset, decisions):
+    # "save", "load" or None. Presets load analysis only once 'calibrate-reuse'
+    # has enabled them, and only if their settings allow it.
+    if not is_x265(preset):
+        return None
+    if preset == SAVE_PRESET:
+        return "save"
+    return "load" if decisions.get(preset, False) and can_load(preset) else None
+
+
+def order_presets(presets):
+    # The analysis has to be saved before any preset can load it
+    return sorted(presets, key=lambda preset: preset != SAVE_PRESET)
+
+
+def needs_save_encode(presets, decisions):
+    # True when presets load analysis but SAVE_PRESET was not selected, so
+    # the analysis must be saved by an encode that writes no result
+    return SAVE_PRESET not in presets and any(
+        reuse_mode(preset, decisions) == "load" for preset in presets
+    )
+
+
+def save_analysis(original_path, compressed_dir, video):
+    # Saves the analysis of a source with SAVE_PRESET, discarding the encode
+    path = analysis_path(compressed_dir, video)
+    output_path = path + ".mp4"
+    encode_with_reuse(
+        original_path, output_path, encoding_commands[SAVE_PRESET], "save", path
+    )
+    os.remove(output_path)
+
+
+def save_time_path(path):
+    return path + ".time"
+
+
+def load_timeout(path):
+    # Seconds a load encode may take, from the time the save encode took
+    if not os.path.exists(save_time_path(path)):
+        return DEFAULT_TIMEOUT
+    with open(save_time_path(path)) as f:
+        return max(MIN_TIMEOUT, TIMEOUT_FACTOR * float(f.read()))
+
+
+def encode_with_reuse(original_path, compressed_path, command_func, mode, path):
+    # Returns (encoding time, status): "independent", "save", "load", or
+    # "fallback" when loading failed and the preset encoded fully
+    if mode == "save":
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        command_func = save_command(command_func, path)
+        encoding_time = encode(original_path, compressed_path, command_func)
+        with open(save_time_path(path), "w") as f:
+            f.write(str(encoding_time))
+        return encoding_time, "save"
+    if mode == "load" and os.path.exists(path):
+        try:
+            return (
+                encode(
+                    original_path,
+                    compressed_path,
+                    load_command(command_func, path),
+                    timeout=load_timeout(path),
+                ),
+                "load",
+            )
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            # x265 can crash or stall on analysis it cannot use; fall back
+            print("analysis reuse failed for", compressed_path, "-", e)
+            remove_if_exists(compressed_path + ".tmp.mp4")
+    status = "independent" if mode is None else "fallback"
+    return encode(original_path, compressed_path, command_func), status
+
+
+def remove_if_exists(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def timed_encode(original_path, output_path, command_func, timeout=None):
+    # Encodes to output_path and returns (time, size), or None on failure
+    start_time = time.time()
+    try:
+        result = subprocess.run(
+            command_func(original_path, output_path),
+            capture_output=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        print("timed out:", output_path)
+        remove_if_exists(output_path + ".tmp.mp4")
+        return None
+    encoding_time = time.time() - start_time
+    if result.returncode != 0:
+        remove_if_exists(output_path + ".tmp.mp4")
+        return None
+    os.rename(output_path + ".tmp.mp4", output_path)
+    return encoding_time, os.path.getsize(output_path)
+
+
+def calibrate(video_dir, work_dir, csv_dir, files=None, metrics=DEFAULT_METRICS):
+    # Encodes each libx265 preset that can load analysis both independently
+    # and with analysis loaded from SAVE_PRESET, then decides per preset
+    # whether reuse holds up. Other presets are never enabled.
+    presets = [p for p in encoding_commands if can_load(p)]
+    os.makedirs(work_dir, exist_ok=True)
+    rows = []
+    for video in list_videos(video_dir, files):
+        original_path = os.path.join(video_dir, video)
+        path = analysis_path(work_dir, video)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_path = os.path.join(work_dir, "save_" + video)
+        saved = timed_encode(
+            original_path,
+            save_path,
+            save_command(encoding_commands[SAVE_PRESET], path),
+            DEFAULT_TIMEOUT,
+        )
+        if saved is None:
+            print("could not save analysis for", video)
+            continue
+        remove_if_exists(save_path)
+        timeout = max(MIN_TIMEOUT, TIMEOUT_FACTOR * saved[0])
+
+        for preset in presets:
+            command_func = encoding_commands[preset]
+            independent_path = os.path.join(work_dir, f"{preset}_full_{video}")
+            reuse_path = os.path.join(work_dir, f"{preset}_reuse_{video}")
+            independent = timed_encode(
+                original_path, independent_path, command_func, timeout
+            )
+            reused = timed_encode(
+                original_path, reuse_path, load_command(command_func, path), timeout
+            )
+            if independent is None:
+                continue
+
+            row = {
+                "preset": preset,
+                "file_name": video,
+                "independent_time": independent[0],
+                "independent_size": independent[1],
+            }
+            quality = evaluate(independent_path, original_path, metrics)
+            row["independent_psnr"] = quality.get("psnr")
+            row["independent_ssim"] = quality.get("ssim")
+            if reused is not None:
+                quality = evaluate(reuse_path, original_path, metrics)
+                row.update(
+                    {
+                        "reuse_time": reused[0],
+                        "reuse_size": reused[1],
+                        "reuse_psnr": quality.get("psnr"),
+                        "reuse_ssim": quality.get("ssim"),
+                        "time_saving": 1 - reused[0] / independent[0],
+                        "size_change": reused[1] / independent[1] - 1,
+                    }
+                )
+                if row["reuse_psnr"] is not None and row["independent_psnr"]:
+                    row["psnr_change"] = row["reuse_psnr"] - row["independent_psnr"]
+            rows.append(row)
+            if reused is None:
+                print(preset, video, "reuse failed")
+            else:
+                print(preset, video, f"{row['time_saving']:.1%} faster")
+            remove_if_exists(independent_path)
+            remove_if_exists(reuse_path)
+
+    write_rows(
+        os.path.join(csv_dir, REUSE_CALIBRATION_FILE), rows, CALIBRATION_COLUMNS
+    )
+    decisions = decide(rows, presets)
+    for preset in encoding_commands:
+        if is_x265(preset) and preset != SAVE_PRESET and preset not in presets:
+            decisions[preset] = False
+    with open(os.path.join(csv_dir, REUSE_FILE), "w") as f:
+        json.dump(decisions, f, indent=2)
+    return decisions
+
+
+def mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def decide(rows, presets):
+    decisions = {}
+    for preset in presets:
+        preset_rows = [row for row in rows if row["preset"] == preset]
+        # A single failed load disables the preset; x265 would fall back to
+        # a full encode anyway and we would pay for both
+        if not preset_rows or any("reuse_time" not in row for row in preset_rows):
+            decisions[preset] = False
+            continue
+        saving = mean([row["time_saving"] for row in preset_rows])
+        growth = mean([row["size_change"] for row in preset_rows])
+        drops = [-row["psnr_change"] for row in preset_rows if "psnr_change" in row]
+        decisions[preset] = (
+            saving >= MIN_TIME_SAVING
+            and growth <= MAX_SIZE_GROWTH
+            and (not drops or mean(drops) <= MAX_PSNR_DROP)
+        )
+    return decisions
@@ -0,0 +1,277 @@
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+from ffparams.results import read_rows
+
+# Recorded runs: a copy of the result CSVs plus the environment they were
+# produced in, under <runs>/<run id>/. Later runs can then be compared per
+# (video, preset) instead of overwriting each other's CSVs.
+ENV_FILE = "env.json"
+
+# (column, direction): +1 when higher is better, -1 when lower is better
+COMPARED = [
+    ("encoding_time", -1),
+    ("decode_fps", +1),
+    ("file_size", -1),
+    ("psnr", +1),
+    ("ssim", +1),
+]
+
+TIMING_COLUMNS = {"encoding_time", "decode_fps"}
+
+
+def first_line(cmd):
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError:
+        return None
+    lines = (result.stdout or result.stderr).strip().split("\n")
+    return lines[0] if lines else None
+
+
+def encoder_version(encoder):
+    # Encodes one tiny frame and reads the version string the library writes:
+    # x265 logs it, x264 embeds it in the stream
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-f",
+                "lavfi",
+                "-i",
+                "testsrc=size=64x64:duration=0.04",
+                "-c:v",
+                encoder,
+                path,
+            ],
+            capture_output=True,
+        )
+        for line in result.stderr.decode(errors="replace").split("\n"):
+            if "encoder version" in line:
+                return line.split("encoder version")[1].strip()
+        with open(path, "rb") as f:
+            data = f.read()
+        i = data.find(b"x264 - core ")
+        if i >= 0:
+            return data[i : data.find(b" - ", i + 12)].decode(errors="replace")
+    except OSError:
+        pass
+    finally:
+        os.remove(path)
+    return None
+
+
+def cpu_model():
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    return platform.processor() or None
+
+
+def fingerprint():
+    return {
+        "ffmpeg": first_line(["ffmpeg", "-version"]),
+        "libx264": encoder_version("libx264"),
+        "libx265": encoder_version("libx265"),
+        "cpu": cpu_model(),
+        "cores": os.cpu_count(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+    }
+
+
+def record(csv_dir, runs_dir, label=None):
+    # Copies every CSV in csv_dir into a new run directory with the
+    # environment fingerprint, and returns the run id
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    if label:
+        run_id += "-" + label
+    run_dir = os.path.join(runs_dir, run_id)
+    os.makedirs(run_dir)
+
+    for root, _, files in os.walk(csv_dir):
+        for name in files:
+            if name.endswith(".csv"):
+                src = os.path.join(root, name)
+                dst = os.path.join(run_dir, os.path.relpath(src, csv_dir))
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copy2(src, dst)
+
+    env = fingerprint()
+    env["recorded"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(os.path.join(run_dir, ENV_FILE), "w") as f:
+        json.dump(env, f, indent=2)
+    return run_id
+
+
+def load_env(run_dir):
+    path = os.path.join(run_dir, ENV_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_samples(run_dir):
+    # {(preset, file_name): {column: [values]}} from the per-preset CSVs and
+    # the repeated timings in bench.csv
+    samples = {}
+
+    def add(preset, row):
+        key = (preset, row["file_name"])
+        for column, _ in COMPARED:
+            value = row.get(column)
+            if value not in (None, ""):
+                columns = samples.setdefault(key, {})
+                columns.setdefault(column, []).append(float(value))
+
+    bench = {}
+    for name in sorted(os.listdir(run_dir)):
+        path = os.path.join(run_dir, name)
+        if name == "bench.csv":
+            for row in read_rows(path):
+                bench.setdefault(row["preset"], []).append(row)
+        elif name.endswith("_cmd.csv"):
+            for row in read_rows(path):
+                add(name[: -len(".csv")], row)
+
+    # Repeated bench timings replace the single timing of the sweep
+    for preset, rows in bench.items():
+        for row in rows:
+            for column in TIMING_COLUMNS:
+                samples.get((preset, row["file_name"]), {}).pop(column, None)
+        for row in rows:
+            add(preset, row)
+    return samples
+
+
+def mann_whitney_p(a, b):
+    # Two-sided Mann-Whitney U test. Exact for small samples (counting the
+    # rank arrangements), normal approximation with tie correction otherwise.
+    n1, n2 = len(a), len(b)
+    values = sorted(a + b)
+    ranks = {}
+    i = 0
+    ties = 0.0
+    while i < len(values):
+        j = i
+        while j < len(values) and values[j] == values[i]:
+            j += 1
+        ranks[values[i]] = (i + j + 1) / 2
+        t = j - i
+        ties += t**3 - t
+        i = j
+    r1 = sum(ranks[v] for v in a)
+    u = r1 - n1 * (n1 + 1) / 2
+    u = min(u, n1 * n2 - u)
+
+    if n1 * n2 <= 400 and ties == 0:
+        counts = exact_u_counts(n1, n2)
+        total = sum(counts)
+        p = 2 * sum(counts[: int(u) + 1]) / total
+        return min(1.0, p)
+
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    var = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if var <= 0:
+        return 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(var)
+    return min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+
+def min_p_value(n1, n2):
+    # Smallest two-sided p the U test can give for these sample sizes, when
+    # the two samples do not overlap at all
+    return min(1.0, 2 / math.comb(n1 + n2, n1))
+
+
+def exact_u_counts(n1, n2):
+    # Number of orderings of n1 + n2 distinct values giving each U statistic
+    # (Mann & Whitney's recurrence), as a list indexed by U
+    memo = {}
+
+    def f(m, n):
+        if (m, n) in memo:
+            return memo[(m, n)]
+        if m == 0 or n == 0:
+            dist = [1]
+        else:
+            left = f(m - 1, n)
+            right = f(m, n - 1)
+            dist = [0] * (m * n + 1)
+            for u, c in enumerate(left):
+                dist[u + n] += c
+            for u, c in enumerate(right):
+                dist[u] += c
+        memo[(m, n)] = dist
+        return dist
+
+    return f(n1, n2)
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def compare(base_dir, new_dir, threshold=0.05, quality_threshold=0.1, alpha=0.05):
+    # Returns one row per (preset, file, column) present in both runs.
+    # Time and size changes are relative, quality changes absolute (PSNR in
+    # dB, SSIM scaled by 100 so both use quality_threshold). Timings with
+    # repeats must also differ significantly to count as a regression, unless
+    # there are too few repeats for the test to ever reach alpha.
+    base, new = load_samples(base_dir), load_samples(new_dir)
+    rows = []
+    too_few = set()
+    for key in sorted(set(base) & set(new)):
+        for column, direction in COMPARED:
+            a, b = base[key].get(column), new[key].get(column)
+            if not a or not b:
+                continue
+            old, current = median(a), median(b)
+            if column in ("psnr", "ssim"):
+                scale = 100 if column == "ssim" else 1
+                change = (current - old) * scale
+                worse = -direction * change > quality_threshold
+            else:
+                change = (current - old) / old if old else 0.0
+                worse = -direction * change > threshold
+
+            p = None
+            if column in TIMING_COLUMNS and len(a) > 1 and len(b) > 1:
+                if min_p_value(len(a), len(b)) < alpha:
+                    p = mann_whitney_p(a, b)
+                    worse = worse and p < alpha
+                else:
+                    too_few.add((len(a), len(b)))
+            rows.append(
+                {
+                    "preset": key[0],
+                    "file_name": key[1],
+                    "column": column,
+                    "base": old,
+                    "new": current,
+                    "change": change,
+                    "p_value": p,
+                    "regression": worse,
+                }
+            )
+    for n1, n2 in sorted(too_few):
+        print(
+            f"warning: {n1} vs {n2} timing repeats cannot reach p < {alpha};"
+            " using the threshold alone for those timings"
+        )
+    return rows
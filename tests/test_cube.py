@@ -0,0 +1,61 @@
+import pytest
+
+from ffparams.cube import Cell, SummaryCube, percentile
+
+
+@pytest.mark.parametrize(
+    "q, expected",
+    # numpy.percentile([1, 2, 3, 4], q) with the default linear method
+    [(0, 1.0), (25, 1.75), (50, 2.5), (90, 3.7), (100, 4.0)],
+)
+def test_percentile_matches_numpy_linear(q, expected):
+    assert percentile([1, 2, 3, 4], q) == pytest.approx(expected)
+
+
+def test_cell_add_remove():
+    cell = Cell([3.0, 1.0])
+    cell.add(2.0)
+    assert cell.values == [1.0, 2.0, 3.0]
+    cell.remove(1.0)
+    cell.remove(5.0)  # not present: ignored
+    assert cell.values == [2.0, 3.0]
+    assert cell.stat("count") == 2
+    assert cell.stat("mean") == 2.5
+    assert cell.stat("p50") == 2.5
+    assert Cell().stat("mean") is None
+
+
+def test_readding_a_file_replaces_it():
+    cube = SummaryCube()
+    cube.add("slow_264_cmd", {"file_name": "a.mp4", "psnr": "40"})
+    cube.add("slow_264_cmd", {"file_name": "a.mp4", "psnr": "42"})
+    assert cube.query("psnr", "count") == {("264", "slow"): 1}
+    assert cube.query("psnr") == {("264", "slow"): 42.0}
+
+
+def test_reset_drops_only_that_preset():
+    cube = SummaryCube()
+    cube.add("slow_264_cmd", {"file_name": "a.mp4", "psnr": "40"})
+    cube.add("slow_265_cmd", {"file_name": "a.mp4", "psnr": "41"})
+    cube.reset("slow_264_cmd")
+    assert cube.query("psnr") == {("265", "slow"): 41.0}
+    cube.add("slow_264_cmd", {"file_name": "a.mp4", "psnr": "39"})
+    assert cube.query("psnr", "count") == {("264", "slow"): 1, ("265", "slow"): 1}
+
+
+def test_save_load_round_trip(tmp_path):
+    cube = SummaryCube()
+    for i, size in enumerate([300, 100, 200]):
+        cube.add(
+            "veryfast_265_cmd",
+            {"file_name": f"{i}.mp4", "file_size": size, "psnr": 40 + i},
+            original_size=600,
+        )
+    path = str(tmp_path / "cube" / "summary_cube.json")
+    cube.save(path)
+    loaded = SummaryCube.load(path)
+    for metric in ("file_size", "psnr", "ratio"):
+        for stat in ("count", "mean", "min", "max", "p50", "p90"):
+            assert loaded.query(metric, stat) == cube.query(metric, stat)
+    assert loaded.cells[("265", "veryfast", "file_size")].values == [100, 200, 300]
+    assert SummaryCube.load(str(tmp_path / "missing.json")).cells == {}
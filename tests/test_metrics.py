@@ -0,0 +1,37 @@
+import pytest
+
+from ffparams.metrics import build_graph, lavfi_filter, parse_instances
+
+INPUTS = ("distorted", "reference")
+
+
+def chain_filters(graph):
+    # Filter name of every chain, in order: "[0:v][1:v]psnr" -> "psnr"
+    return [chain.split("]")[-1].split("=")[0] for chain in graph.split(";")]
+
+
+def test_single_metric_needs_no_split():
+    graph, instances = build_graph([lavfi_filter(["psnr"], None)])
+    assert graph == "[0:v][1:v]psnr"
+    assert instances == [[("Parsed_psnr_0", ["psnr"])]]
+
+
+def test_instances_match_filter_positions():
+    variants = [lavfi_filter(["psnr", "ssim"], None) for _ in range(3)]
+    graph, instances = build_graph(variants, {"reference": "scale=640:360"})
+    filters = chain_filters(graph)
+    names = [name for variant in instances for name, _ in variant]
+    assert len(names) == len(set(names)) == 6
+    for name in names:
+        _, filter_name, index = name.split("_")
+        assert filters[int(index)] == filter_name
+    # Reference is input 3, scaled once before it is split
+    assert graph.startswith("[3:v]scale=640:360[rp];[rp]split=6")
+
+
+def test_parse_instances_raises_without_summary():
+    stderr = "[Parsed_psnr_0 @ 0x1] PSNR y:40.0 u:42.0 v:43.0 average:41.0\n"
+    row = parse_instances(stderr, [("Parsed_psnr_0", ["psnr"])])
+    assert row["psnr"] == 41.0
+    with pytest.raises(RuntimeError):
+        parse_instances(stderr, [("Parsed_ssim_1", ["ssim"])])
@@ -0,0 +1,33 @@
+import threading
+import time
+
+from ffparams.pipeline import DagExecutor
+
+
+def test_decode_benchmarks_run_alone_after_encodes():
+    executor = DagExecutor(4)
+    lock = threading.Lock()
+    running = []
+    log = []
+
+    def task(name, seconds):
+        def run(*_):
+            with lock:
+                running.append(name)
+                log.append((name, len(running)))
+            time.sleep(seconds)
+            with lock:
+                running.remove(name)
+
+        return run
+
+    for i in range(8):
+        encoded = executor.add(f"e{i}", "encode", task(f"e{i}", 0.02))
+        measured = executor.add(f"m{i}", "metrics", task(f"m{i}", 0.01), [encoded])
+        executor.add(f"b{i}", "decode_bench", task(f"b{i}", 0.01), [measured])
+
+    assert executor.run() == []
+    names = [name for name, _ in log]
+    first_bench = min(i for i, name in enumerate(names) if name[0] == "b")
+    assert all(name[0] == "b" for name in names[first_bench:])
+    assert all(count == 1 for name, count in log if name[0] == "b")
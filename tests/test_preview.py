@@ -0,0 +1,30 @@
+import pytest
+
+from ffparams.preview import choose_excerpts, windows
+
+
+def test_windows_merge_short_remainder():
+    assert windows([(0, 25)], 10) == [(0, 10), (10, 25)]
+    assert windows([(0, 5)], 10) == [(0, 5)]
+
+
+def test_no_scene_cuts_still_covers_calm_and_busy_parts():
+    # 10 s at 10 fps without cuts: calm first half, busy second half
+    ti = [1.0] * 50 + [20.0] * 50
+    analysis = {"ti": ti, "cuts": [False] * 100}
+    excerpts = choose_excerpts(analysis, fps=10, excerpt_seconds=2, count=3)
+
+    assert len(excerpts) == 3
+    starts = [start for start, _ in excerpts]
+    assert any(start < 5 for start in starts)
+    assert any(start >= 5 for start in starts)
+    assert sum(weight for _, weight in excerpts) == pytest.approx(1.0)
+
+
+def test_scene_cuts_are_used_when_there_are_enough():
+    ti = [1.0] * 30 + [5.0] * 30 + [20.0] * 40
+    cuts = [False] * 100
+    cuts[30] = cuts[60] = True
+    excerpts = choose_excerpts({"ti": ti, "cuts": cuts}, 10, 1, 3)
+    # One excerpt centred in each scene, weighted by scene length
+    assert excerpts == [(1.0, 0.3), (4.0, 0.3), (7.5, 0.4)]
@@ -0,0 +1,31 @@
+from ffparams.encode import with_x265_params
+from ffparams.presets import encoding_commands
+from ffparams.reuse import analysis_settings, can_load, order_presets, reuse_mode
+
+
+def test_only_matching_presets_can_load():
+    # slow/veryfast/veryslow change ref and rc-lookahead, zerolatency
+    # disables b-frames and lookahead
+    loadable = [preset for preset in encoding_commands if can_load(preset)]
+    assert loadable == ["crf51_265_cmd", "fastdecode_265_cmd", "grain_265_cmd"]
+
+
+def test_x265_params_override_preset_settings():
+    command_func = with_x265_params(encoding_commands["base_265_cmd"], "ref=5")
+    assert analysis_settings(command_func)["ref"] == 5
+
+
+def test_reuse_is_off_until_calibrated():
+    assert reuse_mode("crf51_265_cmd", {}) is None
+    assert reuse_mode("crf51_265_cmd", {"crf51_265_cmd": True}) == "load"
+    assert reuse_mode("slow_265_cmd", {"slow_265_cmd": True}) is None
+    assert reuse_mode("base_265_cmd", {}) == "save"
+    assert reuse_mode("base_264_cmd", {"base_264_cmd": True}) is None
+
+
+def test_save_preset_is_ordered_first_but_never_added():
+    assert order_presets(["crf51_265_cmd", "base_265_cmd"]) == [
+        "base_265_cmd",
+        "crf51_265_cmd",
+    ]
+    assert order_presets(["crf51_265_cmd"]) == ["crf51_265_cmd"]
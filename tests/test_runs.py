@@ -0,0 +1,77 @@
+import math
+
+import pytest
+
+from ffparams.results import BENCH_COLUMNS, write_rows
+from ffparams.runs import compare, exact_u_counts, mann_whitney_p, min_p_value
+
+
+def test_exact_u_distribution():
+    # Orderings of 2 + 2 values by U statistic, C(4, 2) = 6 in total
+    assert exact_u_counts(2, 2) == [1, 1, 2, 1, 1]
+    assert sum(exact_u_counts(4, 4)) == math.comb(8, 4)
+
+
+def test_exact_p_values():
+    assert mann_whitney_p([1, 2, 3, 4], [5, 6, 7, 8]) == pytest.approx(2 / 70)
+    assert mann_whitney_p([5, 6, 7, 8], [1, 2, 3, 4]) == pytest.approx(2 / 70)
+    assert mann_whitney_p([1, 2, 3], [4, 5, 6]) == pytest.approx(0.1)
+    # U = 1: two of the 70 orderings on either side reach it
+    assert mann_whitney_p([1, 2, 3, 5], [4, 6, 7, 8]) == pytest.approx(4 / 70)
+    assert mann_whitney_p([1, 3], [2, 4]) == pytest.approx(2 / 3)
+    assert mann_whitney_p([1, 4], [2, 3]) == 1.0
+
+
+def test_ties_use_normal_approximation():
+    # Ranks 1.5, 1.5, 3.5 | 3.5, 5.5, 5.5: U = 0.5, three tied pairs give a
+    # tie term of 18, var = 9 / 12 * (7 - 18 / 30) = 4.8
+    expected = math.erfc((4.5 - 0.5 - 0.5) / math.sqrt(4.8) / math.sqrt(2))
+    assert mann_whitney_p([1, 1, 2], [2, 3, 3]) == pytest.approx(expected)
+
+
+def test_large_samples_use_normal_approximation():
+    a = [float(i) for i in range(21)]
+    b = [float(i) for i in range(100, 120)]
+    assert mann_whitney_p(a, b) < 1e-6
+
+
+def test_min_p_value():
+    assert min_p_value(2, 2) == pytest.approx(1 / 3)
+    assert min_p_value(3, 3) == pytest.approx(0.1)
+    assert min_p_value(4, 4) == pytest.approx(2 / 70)
+    assert min_p_value(1, 1) == 1.0
+
+
+def write_run(run_dir, times):
+    rows = [
+        {"preset": "base_264_cmd", "file_name": "a.mp4", "encoding_time": t}
+        for t in times
+    ]
+    write_rows(str(run_dir / "bench.csv"), rows, BENCH_COLUMNS)
+
+
+def timing_row(rows):
+    return next(row for row in rows if row["column"] == "encoding_time")
+
+
+def test_too_few_repeats_fall_back_to_threshold(tmp_path, capsys):
+    write_run(tmp_path / "base", [1.0, 1.1, 1.05])
+    write_run(tmp_path / "new", [2.0, 2.1, 2.05])
+    row = timing_row(compare(str(tmp_path / "base"), str(tmp_path / "new")))
+    assert row["regression"]
+    assert row["p_value"] is None
+    assert "3 vs 3 timing repeats" in capsys.readouterr().out
+
+
+def test_enough_repeats_require_significance(tmp_path):
+    # Medians differ by more than the threshold, but the samples overlap
+    write_run(tmp_path / "base", [1.0, 1.05, 1.1, 1.02])
+    write_run(tmp_path / "new", [1.2, 0.9, 1.3, 1.01])
+    row = timing_row(compare(str(tmp_path / "base"), str(tmp_path / "new")))
+    assert row["p_value"] > 0.05
+    assert not row["regression"]
+
+    write_run(tmp_path / "new", [2.0, 2.1, 2.05, 2.2])
+    row = timing_row(compare(str(tmp_path / "base"), str(tmp_path / "new")))
+    assert row["p_value"] < 0.05
+    assert row["regression"]